@@ -1,23 +1,35 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import User
+from .models import SlowQuery, User
+from .pagination import EstimatedCountPaginator
+
+
+class FastChangeListMixin:
+    """
+    Changelist settings for tables that grow to millions of rows:
+    estimated counts instead of COUNT(*), and no second "full result" count.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(FastChangeListMixin, BaseUserAdmin):
     """Custom admin configuration for User model."""
 
     list_display = ("email", "first_name", "surname", "role", "is_staff", "is_active")
     list_filter = ("role", "is_staff", "is_active")
-    search_fields = ("email", "first_name", "surname")
+    # Prefix matches, so the email/name indexes can be used
+    search_fields = ("^email", "^first_name", "^surname")
     ordering = ("email",)
 
     fieldsets = (
         (None, {"fields": ("email", "password")}),
         (_("Personal info"), {"fields": ("first_name", "surname")}),
         (_("Permissions"), {"fields": ("role", "is_active", "is_staff", "is_superuser", "groups", "user_permissions")}),
-        (_("Important dates"), {"fields": ("last_login",)}),
+        (_("Important dates"), {"fields": ("last_login", "date_joined")}),
     )
 
     add_fieldsets = (
@@ -26,3 +38,51 @@ class UserAdmin(BaseUserAdmin):
             "fields": ("email", "first_name", "surname", "role", "password1", "password2"),
         }),
     )
+
+    # Deleting a user cascades to their votes without Vote.delete(), so the
+    # polls they voted in are recounted afterwards.
+    def delete_model(self, request, obj):
+        self._recounting_votes_of([obj.pk], lambda: super(UserAdmin, self).delete_model(request, obj))
+
+    def delete_queryset(self, request, queryset):
+        user_ids = list(queryset.values_list("pk", flat=True))
+        self._recounting_votes_of(user_ids, lambda: super(UserAdmin, self).delete_queryset(request, queryset))
+
+    def _recounting_votes_of(self, user_ids, delete):
+        from polls import events
+        from polls.models import Vote
+
+        poll_ids = set(Vote.objects.filter(user_id__in=user_ids).values_list("poll_id", flat=True))
+        delete()
+        if poll_ids:
+            events.recount_tallies(poll_ids)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Top offenders from the slow-query log; rows are written by SlowQueryLogMiddleware."""
+
+    list_display = ("short_sql", "count", "total_ms", "avg_ms_display", "max_ms", "route", "call_site", "last_seen")
+    list_filter = ("route",)
+    search_fields = ("normalized_sql", "call_site", "route")
+    ordering = ("-total_ms",)
+    fields = (
+        "normalized_sql", "sample_sql", "explain", "call_site", "route",
+        "count", "total_ms", "max_ms", "first_seen", "last_seen",
+    )
+    readonly_fields = fields
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="query")
+    def short_sql(self, obj):
+        return obj.normalized_sql[:120]
+
+    @admin.display(description="avg ms", ordering="total_ms")
+    def avg_ms_display(self, obj):
+        return round(obj.avg_ms, 1)
@@ -0,0 +1,135 @@
+"""
+Admission control: per-route-class concurrency limits with bounded queues.
+
+Every request is classified (by URL name, see ROUTE_CLASSES) and must get a
+slot from its class's limiter, if the class has one, before it runs:
+
+- heavy: analytics, exports, imports and results broken down by voter
+  (`?by=`), the slow aggregations
+- vote:  casting, changing and retracting votes
+- auth:  login/register/refresh (password hashing is CPU bound)
+- read:  everything else, mostly cheap cached reads (including plain
+  results, which are cached and patched in place)
+
+By default only heavy and auth are limited; votes and reads run freely.
+
+When all of a class's slots are busy, up to `queue` requests wait at most
+`timeout` seconds for one; anything beyond that is rejected straight away
+with 503 + Retry-After. A pile-up of slow aggregations therefore holds at
+most `concurrency + queue` worker threads instead of all of them, and the
+other classes keep being served.
+
+Limits are per process (each gunicorn worker has its own), configured in
+settings.ADMISSION_LIMITS. A waiting request holds a worker thread too, so
+each class's `concurrency + queue` has to stay below the worker's thread
+count: otherwise one saturated class takes every thread and requests queue
+in gunicorn's backlog instead of being shed.
+
+Shed counts are kept in the cache (shared across workers with CACHE_URL,
+per process with LocMemCache), reported by /auth/throttle-metrics/ and
+logged as a warning on the first shed of a class and every
+SHED_LOG_EVERY after that.
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+ROUTE_CLASSES = {
+    "poll-timeseries": "heavy",
+    "poll-export": "heavy",
+    "poll-unique-voters": "heavy",
+    "poll-bulk-import": "heavy",
+    "poll-vote": "vote",
+    "poll-ballot": "vote",
+    "auth_login": "auth",
+    "auth_register": "auth",
+    "auth_refresh": "auth",
+}
+# Routes that are only heavy with a query parameter: {url name: (parameter, class)}
+PARAM_CLASSES = {
+    "poll-results": ("by", "heavy"),
+}
+DEFAULT_CLASS = "read"
+
+METRICS_KEY = "admission_shed:%s"
+SHED_LOG_EVERY = 100
+
+
+def _record_shed(limiter):
+    key = METRICS_KEY % limiter.name
+    try:
+        count = cache.incr(key)
+    except ValueError:  # first shed of this class
+        count = 1 if cache.add(key, 1, None) else cache.incr(key)
+    if count == 1 or count % SHED_LOG_EVERY == 0:
+        logger.warning(
+            "Shedding %s requests (%d so far): %d active, %d waiting.",
+            limiter.name, count, limiter.active, limiter.waiting,
+        )
+
+
+def shed_metrics():
+    """Requests rejected per route class."""
+    classes = sorted({*ROUTE_CLASSES.values(), DEFAULT_CLASS})
+    counts = cache.get_many([METRICS_KEY % name for name in classes])
+    return {name: counts[METRICS_KEY % name] for name in classes if METRICS_KEY % name in counts}
+
+
+def route_class(url_name, params=()):
+    param, param_class = PARAM_CLASSES.get(url_name, (None, None))
+    if param is not None and param in params:
+        return param_class
+    return ROUTE_CLASSES.get(url_name, DEFAULT_CLASS)
+
+
+class Limiter:
+    def __init__(self, name, concurrency, queue=0, timeout=0.0, retry_after=1):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Take a slot, waiting in the bounded queue if needed; False when shed."""
+        admitted = self._acquire()
+        if not admitted:
+            _record_shed(self)  # outside the lock: it may be a network round trip
+        return admitted
+
+    def _acquire(self):
+        with self._cond:
+            if self.active < self.concurrency:
+                self.active += 1
+                return True
+            if self.waiting >= self.queue:
+                return False
+            self.waiting += 1
+            deadline = time.monotonic() + self.timeout
+            try:
+                while self.active >= self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+def build_limiters(limits):
+    """{class: Limiter} from settings.ADMISSION_LIMITS."""
+    return {name: Limiter(name, **config) for name, config in limits.items()}
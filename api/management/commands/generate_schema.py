@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema (JSON + YAML) served at /auth/api/docs.json|.yaml."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output-dir", help="Defaults to settings.OPENAPI_SCHEMA_DIR")
+
+    def handle(self, *args, **options):
+        for path in schema.write_schema(options["output_dir"]):
+            self.stdout.write(self.style.SUCCESS(f"✅ Wrote {path}"))
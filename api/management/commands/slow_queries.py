@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from api.models import SlowQuery
+
+ORDERINGS = {"total": "-total_ms", "max": "-max_ms", "count": "-count", "recent": "-last_seen"}
+
+
+class Command(BaseCommand):
+    help = "List the worst query shapes from the slow-query log, with their call site, route and plan."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--order-by", choices=sorted(ORDERINGS), default="total")
+        parser.add_argument("--explain", action="store_true", help="Also print the captured query plans")
+        parser.add_argument("--clear", action="store_true", help="Empty the log instead of listing it")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"✅ Cleared {deleted} slow query shapes."))
+            return
+
+        rows = SlowQuery.objects.order_by(ORDERINGS[options["order_by"]])[: options["limit"]]
+        for rank, row in enumerate(rows, 1):
+            self.stdout.write(self.style.WARNING(
+                f"#{rank}  {row.count}x  total {row.total_ms:.0f} ms  avg {row.avg_ms:.1f} ms  max {row.max_ms:.1f} ms"
+            ))
+            self.stdout.write(f"    route:     {row.route}")
+            self.stdout.write(f"    call site: {row.call_site or '-'}")
+            self.stdout.write(f"    sql:       {row.normalized_sql}")
+            if options["explain"] and row.explain:
+                for line in row.explain.splitlines():
+                    self.stdout.write(f"      {line}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {SlowQuery.objects.count()} slow query shapes logged."
+        ))
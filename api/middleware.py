@@ -0,0 +1,181 @@
+import cProfile
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import admission, profiling, slow_queries
+
+logger = logging.getLogger(__name__)
+
+# One cProfile per process at a time: on Python 3.12+ it is built on
+# sys.monitoring, which refuses a second active profiler.
+_profiler_lock = threading.Lock()
+
+
+class AdmissionControlMiddleware:
+    """
+    Shed load per route class instead of letting every request queue up
+    behind slow ones (see api/admission.py): 503 + Retry-After when a
+    class's slots and wait queue are full.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limiters = admission.build_limiters(settings.ADMISSION_LIMITS) if settings.ADMISSION_CONTROL else {}
+
+    def __call__(self, request):
+        limiter = self.limiters.get(self._route_class(request))
+        if limiter is None:
+            return self.get_response(request)
+        if not limiter.acquire():
+            response = JsonResponse({"error": "Server is busy, please retry shortly."}, status=503)
+            response["Retry-After"] = str(limiter.retry_after)
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            limiter.release()
+
+    def _route_class(self, request):
+        try:
+            url_name = resolve(request.path_info).url_name
+        except Resolver404:
+            url_name = None
+        return admission.route_class(url_name, request.GET)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request on demand, without a redeploy.
+
+    A request is profiled when an admin sends the PROFILING_HEADER header
+    (session or JWT auth), or at random for a PROFILING_SAMPLE_RATE fraction
+    of all requests. It then runs under cProfile, and the profile (.prof,
+    open with pstats/snakeviz) plus a .json of the SQL queries and their
+    timings are written to PROFILING_DIR, which keeps the newest
+    PROFILING_MAX_FILES profiles. An admin's response gets a Server-Timing
+    header with the db / cache / serialize / render breakdown and an
+    X-Profile-Id naming the saved files; other sampled requests are only
+    saved. Only one request per process is profiled at a time; any other
+    runs unprofiled meanwhile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = "HTTP_" + settings.PROFILING_HEADER.upper().replace("-", "_")
+
+    def __call__(self, request):
+        requested = self._should_profile(request)
+        if requested is None or not _profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        except ValueError:  # another profiling tool (e.g. a debugger) is active
+            _profiler_lock.release()
+            logger.warning("Skipping request profile: another profiler is active.")
+            return self.get_response(request)
+
+        profiling.install()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                timings = stack.enter_context(profiling.collect())
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(profiling.record_query))
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+            _profiler_lock.release()
+        total = time.perf_counter() - started
+
+        try:
+            profile_id = self._save(request, response, profiler, timings, total)
+        except OSError:
+            logger.exception("Could not save request profile to %s", settings.PROFILING_DIR)
+            profile_id = None
+        if requested or self._is_admin(request):  # never expose timings to other clients
+            response["Server-Timing"] = timings.server_timing(total)
+            if profile_id:
+                response["X-Profile-Id"] = profile_id
+        return response
+
+    def _should_profile(self, request):
+        """True for an admin's opt-in, False for a sampled request, None to skip."""
+        if request.META.get(self.header) and self._is_admin(request):
+            return True
+        rate = settings.PROFILING_SAMPLE_RATE
+        return False if rate > 0 and random.random() < rate else None
+
+    def _is_admin(self, request):
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            try:
+                user = (JWTAuthentication().authenticate(request) or (None, None))[0]
+            except AuthenticationFailed:
+                return False
+        return bool(user and (user.is_staff or user.role == "admin"))
+
+    def _save(self, request, response, profiler, timings, total):
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", request.path).strip("-") or "root"
+        profile_id = f"{timezone.now():%Y%m%dT%H%M%S%f}-{request.method}-{slug[:60]}-{uuid.uuid4().hex[:8]}"
+
+        profiler.dump_stats(directory / f"{profile_id}.prof")
+        summary = {
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 3),
+            "timings_ms": {kind: round(seconds * 1000, 3) for kind, seconds in timings.totals.items()},
+            "counts": timings.counts,
+            "queries": timings.queries,
+        }
+        (directory / f"{profile_id}.json").write_text(json.dumps(summary, indent=2))
+        self._prune(directory)
+        return profile_id
+
+    def _prune(self, directory):
+        """Delete all but the newest PROFILING_MAX_FILES profiles (ids sort by time)."""
+        saved = sorted(directory.glob("*.prof"), key=lambda path: path.name)
+        for path in saved[: max(len(saved) - settings.PROFILING_MAX_FILES, 0)]:
+            path.unlink(missing_ok=True)  # another process may prune the same files
+            path.with_suffix(".json").unlink(missing_ok=True)
+
+
+class SlowQueryLogMiddleware:
+    """
+    Log the request's queries slower than SLOW_QUERY_THRESHOLD_MS to the
+    SlowQuery table (see api/slow_queries.py), after the response is built.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SLOW_QUERY_LOG:
+            return self.get_response(request)
+
+        recorder = slow_queries.Recorder(request, settings.SLOW_QUERY_THRESHOLD_MS)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        if recorder.entries:
+            slow_queries.flush(recorder.entries)
+        return response
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.db import models
+from django.utils import timezone
 
 
 class UserManager(BaseUserManager):
@@ -38,12 +39,21 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     role = models.CharField(max_length=20, choices=Roles.choices, default=Roles.VOTER)
+    date_joined = models.DateTimeField(default=timezone.now)
 
     objects = UserManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "surname"]
 
+    class Meta:
+        indexes = [
+            # Role filter + cursor pagination on id in the user directory
+            models.Index(fields=["role", "id"], name="user_role_id_idx"),
+            models.Index(fields=["first_name"], name="user_first_name_idx"),
+            models.Index(fields=["surname"], name="user_surname_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -51,3 +61,32 @@ class User(AbstractBaseUser, PermissionsMixin):
     def last_name(self):
         """Compatibility alias so Django admin works with `surname`."""
         return self.surname
+
+
+class SlowQuery(models.Model):
+    """
+    One row per normalized query shape that has exceeded
+    SLOW_QUERY_THRESHOLD_MS (see api/slow_queries.py).
+    """
+
+    fingerprint = models.CharField(max_length=40, unique=True)
+    normalized_sql = models.TextField()
+    sample_sql = models.TextField()
+    explain = models.TextField(blank=True)
+    call_site = models.CharField(max_length=255, blank=True)
+    route = models.CharField(max_length=255, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "slow queries"
+
+    def __str__(self):
+        return self.normalized_sql[:80]
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.count if self.count else 0
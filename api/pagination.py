@@ -0,0 +1,57 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+# Below this many rows an exact COUNT(*) is cheap and preferable.
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimated_row_count(model, using="default"):
+    """
+    Planner statistics row count for the model's table, or None when the
+    backend has none (SQLite) or the table was never analyzed.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that never runs an unbounded COUNT(*):
+    - unfiltered changelists use the planner's row estimate;
+    - filtered/searched ones count at most EXACT_COUNT_THRESHOLD + 1 rows.
+    Use with `show_full_result_count = False` on the ModelAdmin.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not qs.query.where:
+            estimate = estimated_row_count(qs.model, qs.db)
+            if estimate is not None and estimate > EXACT_COUNT_THRESHOLD:
+                return estimate
+        return qs[: EXACT_COUNT_THRESHOLD + 1].count()
+
+
+class UserCursorPagination(CursorPagination):
+    """Keyset pagination on `id`: no COUNT(*) and no deep OFFSETs."""
+    ordering = "id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
@@ -0,0 +1,142 @@
+"""
+Per-request timing breakdown for profiled requests (see ProfilingMiddleware).
+
+While a request is being profiled, a Timings object is bound to a context
+variable and the instrumented code paths add their durations to it:
+
+- db:        every SQL query (connection.execute_wrapper, with the SQL kept)
+- cache:     calls on the configured cache backends
+- serialize: DRF serializer `.data`
+- render:    DRF `Response.rendered_content`
+
+Instrumentation is installed the first time a request is profiled. Outside
+a profiled request each instrumented call costs one ContextVar lookup.
+Nested calls of the same kind (e.g. LocMemCache.get_many calling get, or a
+nested serializer) are only counted once, by the outermost call.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+_current = ContextVar("profiling_timings", default=None)
+_install_lock = threading.Lock()
+_installed = False
+
+KINDS = ("db", "cache", "serialize", "render")
+CACHE_METHODS = (
+    "get", "set", "add", "delete", "touch", "has_key", "incr", "decr",
+    "get_many", "set_many", "delete_many", "get_or_set",
+)
+
+
+class Timings:
+    def __init__(self):
+        self.totals = dict.fromkeys(KINDS, 0.0)
+        self.counts = dict.fromkeys(KINDS, 0)
+        self.queries = []
+        self._depth = dict.fromkeys(KINDS, 0)
+
+    def server_timing(self, total):
+        """Value for the Server-Timing header (durations in ms)."""
+        parts = [
+            f'{kind};dur={self.totals[kind] * 1000:.1f};desc="{self.counts[kind]} calls"'
+            for kind in KINDS
+        ]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(kind):
+    timings = _current.get()
+    if timings is None or timings._depth[kind]:
+        yield
+        return
+    timings._depth[kind] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.totals[kind] += time.perf_counter() - started
+        timings.counts[kind] += 1
+        timings._depth[kind] -= 1
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrapper hook: time the query and keep its SQL."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        timings.totals["db"] += elapsed
+        timings.counts["db"] += 1
+        timings.queries.append({"sql": sql, "many": many, "ms": round(elapsed * 1000, 3)})
+
+
+def _timed_function(func, kind):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return func(*args, **kwargs)
+        with timed(kind):
+            return func(*args, **kwargs)
+
+    wrapper.__profiling_wrapped__ = True
+    return wrapper
+
+
+def _wrap_method(cls, name, kind):
+    func = cls.__dict__.get(name)
+    if func is None or getattr(func, "__profiling_wrapped__", False):
+        return
+    setattr(cls, name, _timed_function(func, kind))
+
+
+def _wrap_property(cls, name, kind):
+    prop = cls.__dict__.get(name)
+    if not isinstance(prop, property) or getattr(prop.fget, "__profiling_wrapped__", False):
+        return
+    setattr(cls, name, property(_timed_function(prop.fget, kind), prop.fset, prop.fdel, prop.__doc__))
+
+
+def install():
+    """Instrument cache backends, serializers and responses (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    with _install_lock:
+        if _installed:
+            return
+        from django.conf import settings
+        from django.core.cache import caches
+        from rest_framework import serializers
+        from rest_framework.response import Response
+
+        for alias in settings.CACHES:
+            for cls in type(caches[alias]).__mro__:
+                for name in CACHE_METHODS:
+                    _wrap_method(cls, name, "cache")
+        for cls in (serializers.BaseSerializer, serializers.Serializer, serializers.ListSerializer):
+            _wrap_property(cls, "data", "serialize")
+        _wrap_property(Response, "rendered_content", "render")
+        _installed = True
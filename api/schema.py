@@ -0,0 +1,142 @@
+"""
+OpenAPI schema, generated once (at image build time) instead of per request.
+
+drf_yasg is heavy to import and to run, so nothing in the request path
+imports it: the swagger annotations for our views live here and are only
+applied by `generate_schema()`, which `manage.py generate_schema` calls
+during the Docker build. Workers just serve the resulting files.
+"""
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+SCHEMA_FORMATS = {
+    "json": ("schema.json", "application/json"),
+    "yaml": ("schema.yaml", "application/yaml"),
+}
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def schema_dir():
+    return Path(settings.OPENAPI_SCHEMA_DIR)
+
+
+def _annotate_views():
+    """Attach the swagger_auto_schema metadata that used to decorate api/views.py."""
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+
+    from .serializers import AdminCreateSerializer, RegisterSerializer
+    from .views import LoginView, LogoutView, RegisterView, UserViewSet
+
+    if getattr(LoginView.post, "_swagger_auto_schema", None):
+        return  # already applied in this process
+
+    RegisterView.perform_create = swagger_auto_schema(
+        operation_description="Register a new user (voter by default). Sends a welcome email asynchronously.",
+        request_body=RegisterSerializer,
+        responses={
+            201: openapi.Response(
+                description="User created successfully",
+                schema=RegisterSerializer
+            )
+        }
+    )(RegisterView.perform_create)
+
+    LoginView.post = swagger_auto_schema(
+        operation_description="Obtain JWT token pair",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['email', 'password'],
+            properties={
+                'email': openapi.Schema(type=openapi.TYPE_STRING),
+                'password': openapi.Schema(type=openapi.TYPE_STRING),
+            },
+        ),
+        responses={200: openapi.Response(
+            description='JWT Token Pair',
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'refresh': openapi.Schema(type=openapi.TYPE_STRING),
+                    'access': openapi.Schema(type=openapi.TYPE_STRING),
+                }
+            )
+        )}
+    )(LoginView.post)
+
+    UserViewSet.create_admin = swagger_auto_schema(
+        operation_description="Create a new admin (admin-only)",
+        request_body=AdminCreateSerializer,
+        responses={201: AdminCreateSerializer}
+    )(UserViewSet.create_admin)
+
+    LogoutView.post = swagger_auto_schema(
+        operation_description="Logout a user by blacklisting their refresh token",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["refresh"],
+            properties={
+                "refresh": openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description="The refresh token to be blacklisted"
+                ),
+            },
+        ),
+        responses={
+            205: openapi.Response(description="Successfully logged out."),
+            400: openapi.Response(description="Invalid or already blacklisted token."),
+        },
+    )(LogoutView.post)
+
+
+def generate_schema():
+    """Introspect every view/serializer and return {format: encoded bytes}."""
+    from drf_yasg import openapi
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    _annotate_views()
+    info = openapi.Info(
+        title="Online Poll System API",
+        default_version='v1',
+        description="Interactive API docs with JWT authentication",
+        terms_of_service="https://example.com/terms/",
+        contact=openapi.Contact(email="support@example.com"),
+        license=openapi.License(name="MIT License"),
+    )
+    schema = OpenAPISchemaGenerator(info).get_schema(request=None, public=True)
+    return {
+        "json": OpenAPICodecJson(validators=[]).encode(schema),
+        "yaml": OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def write_schema(directory=None):
+    directory = Path(directory or schema_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    for fmt, content in generate_schema().items():
+        path = directory / SCHEMA_FORMATS[fmt][0]
+        path.write_bytes(content)
+        written.append(path)
+    return written
+
+
+def load_schema(fmt):
+    """
+    Schema bytes for `fmt`, read from the pre-generated artifact once per
+    process. Falls back to generating it (e.g. in local dev) if missing.
+    """
+    if fmt not in _loaded:
+        with _lock:
+            if fmt not in _loaded:
+                path = schema_dir() / SCHEMA_FORMATS[fmt][0]
+                if path.exists():
+                    _loaded[fmt] = path.read_bytes()
+                else:
+                    _loaded.update(generate_schema())
+    return _loaded[fmt]
@@ -0,0 +1,150 @@
+"""
+Slow-query log (SlowQueryLogMiddleware + the SlowQuery table).
+
+During a request every SQL query is timed; those over
+SLOW_QUERY_THRESHOLD_MS are kept in memory with their Python call site
+(innermost frame in our own code) and the request's route, and written
+out once the response is ready, so the log never writes inside the
+request's transactions.
+
+Queries are aggregated by shape: literals, placeholders, IN lists and
+multi-row VALUES are collapsed before fingerprinting, so `id = 3` and
+`id = 4` are the same offender. The first time a SELECT shape shows up
+its plan is captured (EXPLAIN, or EXPLAIN QUERY PLAN on SQLite) with the
+original parameters.
+"""
+import hashlib
+import logging
+import re
+import time
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+_BASE_DIR = str(Path(settings.BASE_DIR).resolve())
+_SKIP_FILES = {str(Path(__file__).resolve()), str(Path(__file__).resolve().with_name("middleware.py"))}
+
+_NORMALIZERS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%s|\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE), "IN (...)"),
+    (re.compile(r"(\(\?(?:, \?)*\))(?:\s*,\s*\(\?(?:, \?)*\))+"), r"\1, ..."),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize(sql):
+    for pattern, replacement in _NORMALIZERS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def _call_site():
+    """Innermost stack frame in this project's code (not libraries, not the log itself)."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if filename.startswith(_BASE_DIR) and "site-packages" not in filename and filename not in _SKIP_FILES:
+            return f"{Path(filename).relative_to(_BASE_DIR)}:{frame.lineno} in {frame.name}"[:255]
+    return ""
+
+
+class Recorder:
+    """connection.execute_wrapper that keeps the queries slower than `threshold_ms`."""
+
+    def __init__(self, request, threshold_ms):
+        self.request = request
+        self.threshold_ms = threshold_ms
+        self.entries = []
+
+    def route(self):
+        match = getattr(self.request, "resolver_match", None)
+        return f"{self.request.method} {match.route if match else self.request.path}"[:255]
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.threshold_ms:
+                self.entries.append({
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "params": None if many else params,
+                    "ms": elapsed_ms,
+                    "call_site": _call_site(),
+                    "route": self.route(),
+                })
+
+
+def explain(alias, sql, params):
+    """The query plan as text, or "" for statements we don't EXPLAIN."""
+    if not sql.lstrip()[:6].upper().startswith(("SELECT", "WITH")):
+        return ""
+    connection = connections[alias]
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return "\n".join(" | ".join(str(col) for col in row) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+
+
+def _bump(fp, entries, now):
+    last = entries[-1]
+    return SlowQuery.objects.filter(fingerprint=fp).update(
+        count=F("count") + len(entries),
+        total_ms=F("total_ms") + sum(e["ms"] for e in entries),
+        max_ms=Greatest(F("max_ms"), max(e["ms"] for e in entries)),
+        sample_sql=last["sql"],
+        call_site=last["call_site"],
+        route=last["route"],
+        last_seen=now,
+    )
+
+
+def flush(entries):
+    """Fold recorded slow queries into the SlowQuery aggregates."""
+    shapes = {}
+    for entry in entries:
+        normalized = normalize(entry["sql"])
+        shapes.setdefault(fingerprint(normalized), (normalized, []))[1].append(entry)
+
+    now = timezone.now()
+    for fp, (normalized, shape_entries) in shapes.items():
+        try:
+            if _bump(fp, shape_entries, now):
+                continue
+            first = shape_entries[0]
+            try:
+                SlowQuery.objects.create(
+                    fingerprint=fp,
+                    normalized_sql=normalized,
+                    sample_sql=first["sql"],
+                    explain=explain(first["alias"], first["sql"], first["params"]),
+                    call_site=first["call_site"],
+                    route=first["route"],
+                    count=len(shape_entries),
+                    total_ms=sum(e["ms"] for e in shape_entries),
+                    max_ms=max(e["ms"] for e in shape_entries),
+                    first_seen=now,
+                    last_seen=now,
+                )
+            except IntegrityError:
+                _bump(fp, shape_entries, now)  # another worker logged this shape first
+        except DatabaseError:
+            logger.exception("Could not record slow query %s", normalized[:200])
@@ -1,12 +1,39 @@
+import datetime
+import decimal
+import io
+import json
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory
+from api import admission, middleware, parsers, renderers, schema, slow_queries
+from api.middleware import AdmissionControlMiddleware
+from api.models import SlowQuery
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from api.throttling import LoginThrottle, rejection_metrics
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -139,14 +166,36 @@ def test_admin_can_list_users(api_client, admin_user, voter_user):
     # Assertions
     assert response.status_code == status.HTTP_200_OK
     
-    # Check if the response data has the expected pagination structure
+    # Cursor pagination: results + next/previous links, no count
     assert "results" in response.data
-    
-    # Assert the number of users in the 'results' list
-    assert len(response.data["results"]) == 2 # This is the key change
-    
-    # Optional: Check the count key
-    assert response.data["count"] == 2
+    assert "count" not in response.data
+    assert [u["email"] for u in response.data["results"]] == [admin_user.email, voter_user.email]
+
+
+@pytest.mark.django_db
+def test_user_list_cursor_pages_through_all_users(api_client, admin_user, voter_user):
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.get(reverse("user_list"), {"page_size": 1})
+    assert [u["id"] for u in response.data["results"]] == [admin_user.id]
+
+    response = api_client.get(response.data["next"])
+    assert [u["id"] for u in response.data["results"]] == [voter_user.id]
+    assert response.data["next"] is None
+
+
+@pytest.mark.django_db
+def test_user_list_search_and_role_filter(api_client, admin_user, voter_user):
+    api_client.force_authenticate(user=admin_user)
+    url = reverse("user_list")
+
+    response = api_client.get(url, {"search": "vot"})
+    assert [u["id"] for u in response.data["results"]] == [voter_user.id]
+
+    # prefix match only
+    assert api_client.get(url, {"search": "oter"}).data["results"] == []
+
+    response = api_client.get(url, {"role": User.Roles.ADMIN})
+    assert [u["id"] for u in response.data["results"]] == [admin_user.id]
 
 
 @pytest.mark.django_db
@@ -162,3 +211,276 @@ def test_unauthenticated_cannot_list_users(api_client):
     url = reverse("user_list")
     response = api_client.get(url, format="json")
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+# --- JSON Renderer / Parser Tests ---
+def test_orjson_renderer_matches_stdlib_output():
+
+    payload = {
+        "when": datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+        "day": datetime.date(2025, 1, 2),
+        "amount": decimal.Decimal("1.50"),
+        "label": gettext_lazy("Poll"),
+        "text": "line\u2028break",
+    }
+    fast = ORJSONRenderer().render(payload)
+    assert fast == JSONRenderer().render(payload)
+    assert b'"2025-01-02T03:04:05Z"' in fast
+    assert b"\\u2028" in fast
+
+
+def test_orjson_renderer_and_parser_fall_back_without_orjson(monkeypatch):
+
+    monkeypatch.setattr(renderers, "orjson", None)
+    monkeypatch.setattr(parsers, "orjson", None)
+
+    assert renderers.ORJSONRenderer().render({"a": 1}) == b'{"a":1}'
+    assert parsers.ORJSONParser().parse(io.BytesIO(b'{"a": 1}')) == {"a": 1}
+
+
+def test_orjson_parser_rejects_malformed_json():
+
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(b'{"a": '))
+
+
+# --- Throttling Tests ---
+@pytest.mark.django_db
+def test_login_is_throttled_per_ip(api_client, voter_user, monkeypatch):
+    monkeypatch.setattr(LoginThrottle, "THROTTLE_RATES", {"login": "2/min"})
+    url = reverse("auth_login")
+    payload = {"email": "voter@example.com", "password": "wrong-password"}
+    before = rejection_metrics().get("login", 0)
+
+    for _ in range(2):
+        assert api_client.post(url, payload, format="json").status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = api_client.post(url, payload, format="json")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert 1 <= int(response["Retry-After"]) <= 60
+    assert rejection_metrics()["login"] == before + 1
+
+    # other clients have their own bucket
+    response = api_client.post(url, payload, format="json", REMOTE_ADDR="10.0.0.2")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_login_throttle_ignores_spoofed_forwarded_for(api_client, voter_user, monkeypatch, settings):
+    monkeypatch.setattr(LoginThrottle, "THROTTLE_RATES", {"login": "2/min"})
+    url = reverse("auth_login")
+    payload = {"email": "voter@example.com", "password": "wrong-password"}
+
+    # a new forged X-Forwarded-For each time; the edge proxy appends the real client IP
+    statuses = [
+        api_client.post(url, payload, format="json", HTTP_X_FORWARDED_FOR=f"10.9.9.{n}, 203.0.113.7").status_code
+        for n in range(3)
+    ]
+    assert statuses == [401, 401, 429]
+
+
+def test_sliding_window_blocks_bursts_across_a_window_boundary(monkeypatch):
+    monkeypatch.setattr(LoginThrottle, "THROTTLE_RATES", {"login": "10/min"})
+    throttle = LoginThrottle()
+    request = RequestFactory().post("/auth/login/", REMOTE_ADDR="198.51.100.1")
+    key = throttle.get_cache_key(request, None)
+    offset = zlib.crc32(key.encode()) % 60
+    boundary = 60 * 1000 - offset  # a window rolls over here for this client
+
+    clock = iter([boundary - 1] * 10 + [boundary + 1] * 10)
+    monkeypatch.setattr(throttle, "timer", lambda: next(clock))
+    allowed = [throttle.allow_request(request, None) for _ in range(20)]
+    # all 10 just before the boundary, and none right after: the old window still counts
+    assert allowed == [True] * 10 + [False] * 10
+    assert 50 <= throttle.wait() <= 60
+
+
+@pytest.mark.django_db
+def test_throttle_metrics_admin_only(api_client, admin_user, voter_user):
+    url = reverse("throttle_metrics")
+    api_client.force_authenticate(user=voter_user)
+    assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert "rejections" in response.data
+
+
+def test_schema_served_from_pregenerated_artifact(api_client, settings, tmp_path, monkeypatch):
+    settings.OPENAPI_SCHEMA_DIR = str(tmp_path)
+    monkeypatch.setattr(schema, "_loaded", {})
+    schema.write_schema()
+    assert (tmp_path / "schema.json").exists() and (tmp_path / "schema.yaml").exists()
+
+    def fail():
+        raise AssertionError("schema regenerated at request time")
+
+    monkeypatch.setattr(schema, "generate_schema", fail)
+    response = api_client.get(reverse("schema-json", kwargs={"format": ".json"}))
+    assert response.status_code == status.HTTP_200_OK
+    document = json.loads(response.content)
+    assert "/auth/login/" in document["paths"]
+    assert document["paths"]["/auth/logout/"]["post"]["description"].startswith("Logout a user")
+
+    response = api_client.get(reverse("schema-json", kwargs={"format": ".yaml"}))
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/yaml"
+
+    response = api_client.get(reverse("schema-swagger-ui"))
+    assert response.status_code == status.HTTP_200_OK
+    assert b"/auth/api/docs.json" in response.content
+
+
+# --- Profiling Tests ---
+@pytest.mark.django_db
+def test_admin_can_profile_a_request(api_client, admin_user, voter_user, settings, tmp_path):
+    settings.PROFILING_DIR = str(tmp_path)
+    url = reverse("user_list")
+
+    # the header alone doesn't profile: only admins may opt in
+    api_client.force_login(voter_user)
+    response = api_client.get(url, HTTP_X_PROFILE="1")
+    assert "Server-Timing" not in response
+    assert not list(tmp_path.iterdir())
+
+    api_client.force_login(admin_user)
+    response = api_client.get(url, HTTP_X_PROFILE="1")
+    assert response.status_code == status.HTTP_200_OK
+    timing = response["Server-Timing"]
+    for kind in ("db", "cache", "serialize", "render", "total"):
+        assert f"{kind};dur=" in timing
+
+    profile_id = response["X-Profile-Id"]
+    assert (tmp_path / f"{profile_id}.prof").exists()
+    summary = json.loads((tmp_path / f"{profile_id}.json").read_text())
+    assert summary["status"] == 200
+    assert summary["counts"]["serialize"] >= 1 and summary["counts"]["render"] == 1
+    assert any('"api_user"' in query["sql"] for query in summary["queries"])
+
+    # no header, no sampling: untouched
+    assert "Server-Timing" not in api_client.get(url)
+
+
+@pytest.mark.django_db
+def test_profiling_skipped_while_another_profiler_runs(api_client, admin_user, settings, tmp_path, monkeypatch):
+    settings.PROFILING_DIR = str(tmp_path)
+    url = reverse("user_list")
+    api_client.force_login(admin_user)
+
+    # another request of this process is being profiled
+    with middleware._profiler_lock:
+        response = api_client.get(url, HTTP_X_PROFILE="1")
+    assert response.status_code == status.HTTP_200_OK and "Server-Timing" not in response
+
+    # some other tool holds the profiler (cProfile on 3.12+ raises instead of stacking)
+    class BusyProfile:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(middleware.cProfile, "Profile", BusyProfile)
+    response = api_client.get(url, HTTP_X_PROFILE="1")
+    assert response.status_code == status.HTTP_200_OK and "Server-Timing" not in response
+    assert not middleware._profiler_lock.locked()
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.django_db
+def test_sampled_profiles_are_capped_and_only_admins_see_headers(
+    api_client, admin_user, voter_user, settings, tmp_path
+):
+    settings.PROFILING_DIR = str(tmp_path)
+    settings.PROFILING_SAMPLE_RATE = 1.0
+    settings.PROFILING_MAX_FILES = 2
+    url = reverse("poll-list")
+
+    # anonymous responses are also cached, so headers there would reach every client
+    assert "Server-Timing" not in api_client.get(url)
+    api_client.force_login(voter_user)
+    for _ in range(3):
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert "Server-Timing" not in response and "X-Profile-Id" not in response
+    assert len(list(tmp_path.glob("*.prof"))) == len(list(tmp_path.glob("*.json"))) == 2
+
+    api_client.force_login(admin_user)
+    profile_id = api_client.get(url)["X-Profile-Id"]
+    assert sorted(path.stem for path in tmp_path.glob("*.prof"))[-1] == profile_id
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+# --- Slow Query Log Tests ---
+def test_slow_query_normalization_groups_query_shapes():
+    a = slow_queries.normalize("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x''y'  LIMIT 21")
+    b = slow_queries.normalize("SELECT *\nFROM t WHERE id IN (%s) AND name = 'z' LIMIT 5")
+    assert a == b == "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?"
+    assert slow_queries.normalize("INSERT INTO t VALUES (%s, %s), (%s, %s), (%s, %s)") == "INSERT INTO t VALUES (?, ?), ..."
+
+
+@pytest.mark.django_db
+def test_slow_queries_are_logged_with_route_and_plan(api_client, admin_user, settings):
+    settings.SLOW_QUERY_THRESHOLD_MS = 0  # everything counts as slow
+    api_client.force_authenticate(user=admin_user)
+    url = reverse("user_list")
+    api_client.get(url)
+    api_client.get(url, {"role": User.Roles.VOTER})
+
+    users = SlowQuery.objects.get(normalized_sql__contains='FROM "api_user" WHERE "api_user"."role" = ?')
+    assert users.count == 1
+    assert users.route == "GET auth/users/"
+    assert "SCAN" in users.explain or "SEARCH" in users.explain
+
+    user_list = SlowQuery.objects.filter(normalized_sql__startswith='SELECT "api_user"')
+    assert sum(row.count for row in user_list) >= 2
+
+    out = io.StringIO()
+    call_command("slow_queries", "--explain", stdout=out)
+    assert "GET auth/users/" in out.getvalue()
+
+
+# --- Admission Control Tests ---
+def test_admission_defaults_let_concurrent_reads_through():
+    # as many reads at once as a worker has threads (entrypoint.sh: --threads=4), all in flight together
+    threads = 4
+    barrier = threading.Barrier(threads, timeout=5)
+
+    def view(request):
+        barrier.wait()
+        return "served"
+
+    middleware = AdmissionControlMiddleware(view)
+    factory = RequestFactory()
+    paths = ["/api/polls/", "/api/polls/1/", "/api/polls/1/results/", "/api/polls/trending/"]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        responses = list(pool.map(lambda path: middleware(factory.get(path)), paths))
+    assert responses == ["served"] * threads
+
+    # a results breakdown is a heavy aggregation
+    assert admission.route_class("poll-results", {"by": "role"}) == "heavy"
+    assert admission.route_class("poll-results", {}) == "read"
+
+
+def test_admission_control_sheds_saturated_route_class(settings, caplog):
+    settings.ADMISSION_LIMITS = {
+        "heavy": {"concurrency": 1, "queue": 1, "timeout": 0.05, "retry_after": 5},
+        "read": {"concurrency": 1, "queue": 0},
+    }
+    middleware = AdmissionControlMiddleware(lambda request: "served")
+    heavy, read = middleware.limiters["heavy"], middleware.limiters["read"]
+    factory = RequestFactory()
+    before = admission.shed_metrics().get("heavy", 0)
+
+    assert heavy.acquire()  # a slow aggregation holds the only slot
+    # queued, then rejected when no slot frees up within the timeout
+    response = middleware(factory.get("/api/polls/1/results/", {"by": "role"}))
+    assert response.status_code == 503
+    assert response["Retry-After"] == "5"
+    assert admission.shed_metrics()["heavy"] == before + 1
+    assert "Shedding heavy requests" in caplog.text
+
+    # other classes are unaffected, and slots are given back afterwards
+    assert middleware(factory.get("/api/polls/")) == "served"
+    assert read.active == 0
+    heavy.release()
+    assert middleware(factory.get("/api/polls/1/results/", {"by": "role"})) == "served"
+    assert heavy.active == 0
@@ -0,0 +1,132 @@
+"""
+Cache-backed sliding-window throttles.
+
+Each client may make N requests per period (rate "N/period" in
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]). Requests are counted in one
+cache counter per (scope, client, period window), and the limit is checked
+against a sliding-window estimate:
+
+    previous window's count × (share of it still inside the last period)
+    + current window's count
+
+so, unlike a plain fixed window, a client can't get ~2N requests through
+by bursting on both sides of a window boundary. Every request — allowed or
+rejected — costs one atomic `cache.incr` and one `cache.get` (plus one
+`cache.add` the first time a window is used). Windows are offset per
+client so they don't all roll over at the same instant.
+
+Unlike DRF's SimpleRateThrottle, no per-request timestamp history is
+read or written.
+
+Client IPs come from DRF's `get_ident`, which trusts only the last
+REST_FRAMEWORK["NUM_PROXIES"] entries of X-Forwarded-For (the ones our own
+proxies appended), so clients can't pick their own bucket by sending a
+forged header.
+
+Rejection counts are kept in the cache too, so with a shared cache
+(CACHE_URL) /auth/throttle-metrics/ reports all workers; with the default
+per-process LocMemCache it reports the worker that answered.
+"""
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from rest_framework.throttling import SimpleRateThrottle
+
+METRICS_KEY = "throttle_rejections:%s"
+
+
+def _incr(cache, key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # First use of this counter
+        return 1 if cache.add(key, 1, timeout) else cache.incr(key)
+
+
+def record_rejection(scope):
+    _incr(default_cache, METRICS_KEY % scope, None)
+
+
+def rejection_metrics():
+    """Rejected requests per scope (see the module docstring for how widely this is shared)."""
+    scopes = settings.REST_FRAMEWORK.get("DEFAULT_THROTTLE_RATES", {})
+    counts = default_cache.get_many([METRICS_KEY % scope for scope in scopes])
+    return {scope: counts[METRICS_KEY % scope] for scope in scopes if METRICS_KEY % scope in counts}
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    cache = default_cache
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        offset = zlib.crc32(self.key.encode()) % self.duration
+        position = (now + offset) / self.duration
+        window = int(position)
+        remaining_share = 1 - (position - window)  # of the previous window, still within the last period
+
+        current = _incr(self.cache, f"{self.key}:{window}", 2 * self.duration + 1)
+        previous = self.cache.get(f"{self.key}:{window - 1}", 0)
+        if previous * remaining_share + current <= self.num_requests:
+            return True
+
+        self.retry_after = self._retry_after(previous, current, remaining_share)
+        record_rejection(self.scope)
+        return False
+
+    def _retry_after(self, previous, current, remaining_share):
+        """Seconds until the estimate is back under the limit (at the latest, when the window rolls over)."""
+        until_rollover = remaining_share * self.duration
+        if current >= self.num_requests or not previous:
+            return until_rollover
+        # previous × share' + current ≤ N  ⇔  share' ≤ (N − current) / previous
+        share_needed = (self.num_requests - current) / previous
+        return max(remaining_share - share_needed, 0) * self.duration
+
+    def wait(self):
+        return max(getattr(self, "retry_after", self.duration), 1)
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottle):
+    """Per-user bucket; anonymous requests fall back to the client IP."""
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class IPSlidingWindowThrottle(SlidingWindowThrottle):
+    """Per-IP bucket, regardless of authentication."""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": f"ip:{self.get_ident(request)}"}
+
+
+# -----------------------------
+# Endpoint throttles
+# -----------------------------
+class LoginThrottle(IPSlidingWindowThrottle):
+    scope = "login"
+
+
+class RegisterThrottle(IPSlidingWindowThrottle):
+    scope = "register"
+
+
+class VoteThrottle(UserSlidingWindowThrottle):
+    scope = "vote"
+
+
+class VoteIPThrottle(IPSlidingWindowThrottle):
+    scope = "vote_ip"
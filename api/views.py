@@ -1,14 +1,22 @@
 from rest_framework import generics, permissions, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
 from .tasks import send_welcome_email
 from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.urls import reverse
+from django.views import View
 from .serializers import RegisterSerializer, AdminCreateSerializer, UserSerializer, LogoutSerializer
 from .permissions import IsAdminUser
+from .pagination import UserCursorPagination
+from .throttling import LoginThrottle, RegisterThrottle, rejection_metrics
+from . import schema
+from .admission import shed_metrics
 
 User = get_user_model()
 
@@ -18,20 +26,11 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegisterThrottle]
 
     def get_serializer_context(self):
         return {"request": self.request}
 
-    @swagger_auto_schema(
-        operation_description="Register a new user (voter by default). Sends a welcome email asynchronously.",
-        request_body=RegisterSerializer,
-        responses={
-            201: openapi.Response(
-                description="User created successfully",
-                schema=RegisterSerializer
-            )
-        }
-    )
     def perform_create(self, serializer):
         user = serializer.save()
         # Send welcome email in a background thread
@@ -42,28 +41,8 @@ class LoginView(TokenObtainPairView):
     """JWT login view with documented request/response in Swagger."""
     serializer_class = TokenObtainPairSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginThrottle]  # each attempt is a PBKDF2 check
 
-    @swagger_auto_schema(
-        operation_description="Obtain JWT token pair",
-        request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            required=['email', 'password'],
-            properties={
-                'email': openapi.Schema(type=openapi.TYPE_STRING),
-                'password': openapi.Schema(type=openapi.TYPE_STRING),
-            },
-        ),
-        responses={200: openapi.Response(
-            description='JWT Token Pair',
-            schema=openapi.Schema(
-                type=openapi.TYPE_OBJECT,
-                properties={
-                    'refresh': openapi.Schema(type=openapi.TYPE_STRING),
-                    'access': openapi.Schema(type=openapi.TYPE_STRING),
-                }
-            )
-        )}
-    )
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
 
@@ -74,10 +53,38 @@ class RefreshView(TokenRefreshView):
 
 
 class UserListView(generics.ListAPIView):
-    """List all users — only admins can access this."""
-    queryset = User.objects.all()
+    """
+    List users — only admins can access this.
+    Cursor-paginated by id; `?search=` matches the start of email, first name
+    or surname, `?role=` filters by role. Every filter is index-backed.
+    """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    pagination_class = UserCursorPagination
+
+    def get_queryset(self):
+        qs = User.objects.only(*UserSerializer.Meta.fields)
+
+        role = self.request.query_params.get("role")
+        if role:
+            qs = qs.filter(role=role)
+
+        search = self.request.query_params.get("search", "").strip()
+        if search:
+            qs = qs.filter(
+                Q(email__istartswith=search)
+                | Q(first_name__istartswith=search)
+                | Q(surname__istartswith=search)
+            )
+        return qs
+
+
+class ThrottleMetricsView(APIView):
+    """Throttle rejections per scope and shed requests per route class (admin only)."""
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({"rejections": rejection_metrics(), "shed": shed_metrics()})
 
 
 class UserViewSet(viewsets.GenericViewSet):
@@ -85,11 +92,6 @@ class UserViewSet(viewsets.GenericViewSet):
     queryset = User.objects.all()
     serializer_class = AdminCreateSerializer
 
-    @swagger_auto_schema(
-        operation_description="Create a new admin (admin-only)",
-        request_body=AdminCreateSerializer,
-        responses={201: AdminCreateSerializer}
-    )
     @action(detail=False, methods=["post"], permission_classes=[permissions.IsAuthenticated, IsAdminUser])
     def create_admin(self, request):
         serializer = AdminCreateSerializer(data=request.data)
@@ -111,25 +113,27 @@ class LogoutView(generics.GenericAPIView):
     serializer_class = LogoutSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    @swagger_auto_schema(
-        operation_description="Logout a user by blacklisting their refresh token",
-        request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            required=["refresh"],
-            properties={
-                "refresh": openapi.Schema(
-                    type=openapi.TYPE_STRING,
-                    description="The refresh token to be blacklisted"
-                ),
-            },
-        ),
-        responses={
-            205: openapi.Response(description="Successfully logged out."),
-            400: openapi.Response(description="Invalid or already blacklisted token."),
-        },
-    )
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response({"detail": "Successfully logged out."}, status=status.HTTP_205_RESET_CONTENT)
\ No newline at end of file
+        return Response({"detail": "Successfully logged out."}, status=status.HTTP_205_RESET_CONTENT)
+
+
+class SchemaView(View):
+    """Serve the pre-generated OpenAPI schema (see api/schema.py)."""
+
+    def get(self, request, format):
+        fmt = format.lstrip(".")
+        response = HttpResponse(schema.load_schema(fmt), content_type=schema.SCHEMA_FORMATS[fmt][1])
+        response["Cache-Control"] = "public, max-age=3600"
+        return response
+
+
+class SwaggerUIView(View):
+    """Swagger UI page pointing at the pre-generated JSON schema."""
+
+    def get(self, request):
+        return render(request, "api/swagger_ui.html", {
+            "schema_url": reverse("schema-json", kwargs={"format": ".json"}),
+        })
@@ -0,0 +1,105 @@
+"""
+Benchmark: instant-runoff tally, vectorized NumPy engine vs pure Python.
+
+Usage (from the repo root):
+    python benchmarks/bench_irv.py [--ballots 1000000] [--options 8] [--skip-python] [--load 100000]
+
+Ballots are random partial rankings with a skewed first preference, so
+the runoff needs several rounds. The engines are timed on an in-memory
+matrix; then --load of those ballots are stored as votes in a throwaway
+in-memory SQLite database and runoff.load_ballots() is timed reading them
+back, with its peak traced memory (0 skips the loading step).
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["CI"] = "1"  # in-memory SQLite
+os.environ.setdefault("DEBUG", "1")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "online_poll_system.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from api.models import User  # noqa: E402
+from polls.models import Option, Poll, Vote  # noqa: E402
+from polls.runoff import instant_runoff_numpy, instant_runoff_python, load_ballots  # noqa: E402
+
+
+def make_ballots(num_ballots, num_options, seed=42):
+    rng = np.random.default_rng(seed)
+    weights = np.linspace(1.0, 2.0, num_options)  # later options slightly more popular
+    keys = rng.random((num_ballots, num_options)) ** (1.0 / weights)
+    ranked = np.argsort(-keys, axis=1).astype(np.int32)
+    lengths = rng.integers(1, num_options + 1, size=num_ballots)
+    ranked[np.arange(num_options) >= lengths[:, None]] = -1
+    return ranked
+
+
+def store_ballots(matrix, num_options):
+    """Save the matrix rows as votes on a new ranked poll; returns (poll id, option ids)."""
+    call_command("migrate", verbosity=0)
+    admin = User.objects.create_superuser(email="bench@example.com", password="benchpass123")
+    poll = Poll.objects.create(title="Bench runoff", created_by=admin, kind=Poll.Kind.RANKED)
+    option_ids = [o.id for o in Option.objects.bulk_create(
+        [Option(poll=poll, text=f"Option {j}") for j in range(num_options)]
+    )]
+    users = User.objects.bulk_create(
+        [User(email=f"voter-{n}@example.com") for n in range(len(matrix))], batch_size=10_000
+    )
+    votes = []
+    for user, row in zip(users, matrix.tolist()):
+        choices = [option_ids[i] for i in row if i >= 0]
+        votes.append(Vote(user=user, poll=poll, option_id=choices[0], choices=choices))
+    Vote.objects.bulk_create(votes, batch_size=10_000)
+    return poll.id, option_ids
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ballots", type=int, default=1_000_000)
+    parser.add_argument("--options", type=int, default=8)
+    parser.add_argument("--skip-python", action="store_true", help="Only time the NumPy engine")
+    parser.add_argument("--load", type=int, default=100_000, help="Ballots to store and load back (0 skips)")
+    args = parser.parse_args()
+
+    matrix = make_ballots(args.ballots, args.options)
+    print(f"{args.ballots:,} ballots, {args.options} options, {matrix.nbytes / 1e6:.1f} MB matrix")
+
+    (rounds, winner), elapsed = timed(instant_runoff_numpy, matrix, args.options)
+    print(f"numpy:  {elapsed:8.3f}s  rounds={len(rounds)} winner={winner}")
+
+    if not args.skip_python:
+        ballots = [[i for i in row if i >= 0] for row in matrix.tolist()]
+        (py_rounds, py_winner), py_elapsed = timed(instant_runoff_python, ballots, args.options)
+        assert (py_rounds, py_winner) == (rounds, winner), "engines disagree"
+        print(f"python: {py_elapsed:8.3f}s  ({py_elapsed / elapsed:.1f}x slower)")
+
+    if args.load:
+        stored = matrix[:args.load]
+        poll_id, option_ids = store_ballots(stored, args.options)
+        tracemalloc.start()
+        loaded, load_elapsed = timed(load_ballots, poll_id, option_ids)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert np.array_equal(loaded, stored), "loaded ballots differ"
+        print(f"load:   {load_elapsed:8.3f}s  {len(loaded):,} ballots, peak {peak / 1e6:.1f} MB traced")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: stdlib JSONRenderer vs ORJSONRenderer on poll payloads.
+
+Usage (from the repo root):
+    python benchmarks/bench_json.py [--polls 200] [--options 6] [--repeat 50]
+
+Runs against a throwaway in-memory SQLite database, so it never touches
+the configured DB.
+"""
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["CI"] = "1"  # in-memory SQLite
+os.environ.setdefault("DEBUG", "1")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "online_poll_system.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api.models import User  # noqa: E402
+from api.renderers import ORJSONRenderer  # noqa: E402
+from polls.models import Option, Poll  # noqa: E402
+from polls.serializers import PollSerializer  # noqa: E402
+
+
+def build_payloads(num_polls, num_options):
+    call_command("migrate", verbosity=0)
+    admin = User.objects.create_superuser(email="bench@example.com", password="benchpass123")
+    polls = Poll.objects.bulk_create([
+        Poll(title=f"Poll {i} — what's your pick?", description="Lorem ipsum " * 10, created_by=admin)
+        for i in range(num_polls)
+    ])
+    for poll in Poll.objects.all():
+        poll.save()  # fills expires_at
+    Option.objects.bulk_create([
+        Option(poll=poll, text=f"Option {j}") for poll in polls for j in range(num_options)
+    ])
+
+    qs = Poll.objects.select_related("created_by").prefetch_related("options")
+    list_payload = PollSerializer(qs, many=True).data
+    poll = qs.first()
+    results_payload = {
+        "poll": PollSerializer(poll).data,
+        "total_votes": 123456,
+        "options": [
+            {"id": opt.id, "text": opt.text, "votes_count": 1000 + opt.id}
+            for opt in poll.options.all()
+        ],
+    }
+    return list_payload, results_payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--polls", type=int, default=200)
+    parser.add_argument("--options", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    list_payload, results_payload = build_payloads(args.polls, args.options)
+    renderers = {"stdlib": JSONRenderer(), "orjson": ORJSONRenderer()}
+
+    for name, payload in (("poll list", list_payload), ("results", results_payload)):
+        baseline = None
+        for label, renderer in renderers.items():
+            seconds = min(timeit.repeat(lambda: renderer.render(payload), number=args.repeat, repeat=5))
+            per_call = seconds / args.repeat * 1e6
+            baseline = baseline or per_call
+            print(f"{name:10} {label:7} {per_call:10.1f} µs/render  ({baseline / per_call:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
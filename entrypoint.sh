@@ -1,20 +1,61 @@
 #!/bin/sh
 set -e
 
-echo "Waiting for database..."
-until nc -z db 5432; do
-  sleep 2
-done
-echo "Database is ready!"
+# Usage:
+#   entrypoint.sh           start gunicorn (default; fast path, no migrate/collectstatic)
+#   entrypoint.sh migrate   one-shot job: apply migrations and exit
+#   entrypoint.sh <cmd...>  run any other command (e.g. python manage.py shell)
 
-echo "Running migrations..."
-python manage.py migrate --noinput
+# Seconds since epoch; gunicorn.conf.py reports the cold-start time against it
+export CONTAINER_STARTED_AT="${CONTAINER_STARTED_AT:-$(date +%s.%N)}"
 
-echo "Collecting static files..."
-python manage.py collectstatic --noinput
+wait_for_db() {
+  echo "Waiting for database at ${DB_HOST:-db}:${DB_PORT:-5432}..."
+  until nc -z "${DB_HOST:-db}" "${DB_PORT:-5432}"; do
+    sleep 1
+  done
+  echo "Database is ready!"
+}
+
+case "${1:-web}" in
+  migrate)
+    wait_for_db
+    echo "Running migrations..."
+    exec python manage.py migrate --noinput
+    ;;
+  web)
+    ;;
+  *)
+    exec "$@"
+    ;;
+esac
+
+wait_for_db
+
+if [ "${SKIP_MIGRATION_CHECK:-0}" != "1" ]; then
+  # Migrations are applied by the one-shot `migrate` job; just refuse to serve an out-of-date schema
+  echo "Checking migrations..."
+  python manage.py migrate --check --noinput || {
+    echo "Unapplied migrations: run '/app/entrypoint.sh migrate' first." >&2
+    exit 1
+  }
+fi
+
+if [ ! -f staticfiles/staticfiles.json ]; then
+  # Static files are built into the image; only a bind-mounted dev checkout lacks them
+  echo "Collecting static files..."
+  python manage.py collectstatic --noinput
+fi
+
+if [ "${WARM_CACHE_ON_START:-0}" = "1" ]; then
+  # Shared caches are warmed once here; per-process caches by each worker (gunicorn.conf.py)
+  echo "Warming cache..."
+  python manage.py warm_cache --skip-local-cache || echo "Cache warm-up failed, continuing."
+fi
 
 echo "Starting Gunicorn..."
 exec gunicorn online_poll_system.wsgi:application \
+    --config gunicorn.conf.py \
     --bind 0.0.0.0:8000 \
     --workers=4 \
     --threads=4 \
@@ -0,0 +1,50 @@
+"""
+Gunicorn settings shared by every container (CLI flags in entrypoint.sh
+still take precedence).
+"""
+import os
+import threading
+import time
+
+# Import the app once in the master so workers share it copy-on-write and
+# fork fast. Off by default: code reloads then need a full restart.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0") == "1"
+
+# Warn when container start -> ready to serve exceeds this many seconds
+COLD_START_BUDGET = float(os.environ.get("COLD_START_BUDGET_SECONDS", "10"))
+
+
+def when_ready(server):
+    """Report the cold-start time measured from entrypoint.sh."""
+    started_at = os.environ.get("CONTAINER_STARTED_AT")
+    if not started_at:
+        return
+    elapsed = time.time() - float(started_at)
+    if elapsed > COLD_START_BUDGET:
+        server.log.warning("Cold start took %.2fs (budget %.0fs)", elapsed, COLD_START_BUDGET)
+    else:
+        server.log.info("Cold start took %.2fs", elapsed)
+
+
+def post_worker_init(worker):
+    """
+    With a per-process cache (LocMemCache), every worker starts cold, so
+    warm it in the background right after the app is loaded. Shared caches
+    are warmed once by entrypoint.sh instead.
+    """
+    if os.environ.get("WARM_CACHE_ON_START") != "1":
+        return
+
+    from django.core.management import call_command
+    from polls.poll_meta import cache_is_process_local
+
+    if not cache_is_process_local():
+        return
+
+    def warm():
+        try:
+            call_command("warm_cache", concurrency=int(os.environ.get("WARM_CACHE_CONCURRENCY", "2")))
+        except Exception:
+            worker.log.exception("Cache warm-up failed")
+
+    threading.Thread(target=warm, name="cache-warmup", daemon=True).start()
@@ -35,6 +35,9 @@ if not SECRET_KEY:
 
 ALLOWED_HOSTS = ['codedman.pythonanywhere.com', 'www.codedman.pythonanywhere.com', '127.0.0.1', 'localhost']
 
+# Scheme and host clients use; warm_cache requests pages as they would
+PUBLIC_URL = env("PUBLIC_URL", default=f"https://{ALLOWED_HOSTS[0]}")
+
 # --------------------------
 # DATABASE
 # --------------------------
@@ -87,13 +90,17 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Static files in production
-    "corsheaders.middleware.CorsMiddleware",  # CORS
+    "corsheaders.middleware.CorsMiddleware",  # CORS (also on cached responses)
+    "polls.middleware.AnonymousResponseCacheMiddleware",  # hits skip everything below
+    "api.middleware.AdmissionControlMiddleware",  # shed load before doing any work
+    "api.middleware.SlowQueryLogMiddleware",  # early, so session/auth queries are timed too
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.ProfilingMiddleware",  # after auth: profiling is admin opt-in
 ]
 
 ROOT_URLCONF = "online_poll_system.urls"
@@ -139,7 +146,25 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# STATICFILES_STORAGE is ignored since Django 5.1; STORAGES is what actually applies.
+# Hashing + compression run once, at image build time (see Dockerfile).
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        # Needs a collected manifest; set STATICFILES_BACKEND to
+        # django.contrib.staticfiles.storage.StaticFilesStorage where there is none
+        "BACKEND": env(
+            "STATICFILES_BACKEND", default="whitenoise.storage.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+
+# OpenAPI schema artifact, written at build time by `manage.py generate_schema`
+OPENAPI_SCHEMA_DIR = env("OPENAPI_SCHEMA_DIR", default=os.path.join(BASE_DIR, "openapi"))
+# Gzip JSONL archives of purged polls, written by `manage.py archive_polls`
+POLL_ARCHIVE_DIR = env("POLL_ARCHIVE_DIR", default=os.path.join(BASE_DIR, "archive"))
+# Date-partitioned Parquet/Arrow files of votes, appended by `manage.py export_votes_columnar`
+ANALYTICS_EXPORT_DIR = env("ANALYTICS_EXPORT_DIR", default=os.path.join(BASE_DIR, "analytics"))
 # --------------------------
 # MEDIA FILES (Optional)
 # --------------------------
@@ -159,19 +184,70 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
+    # orjson-backed JSON; both classes fall back to stdlib json if orjson is missing
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    # Sliding-window limits per endpoint (api/throttling.py), "<requests>/<period>"
+    "DEFAULT_THROTTLE_RATES": {
+        "login": env("THROTTLE_RATE_LOGIN", default="10/min"),
+        "register": env("THROTTLE_RATE_REGISTER", default="5/min"),
+        "vote": env("THROTTLE_RATE_VOTE", default="30/min"),
+        "vote_ip": env("THROTTLE_RATE_VOTE_IP", default="300/min"),
+    },
+    # Proxies in front of gunicorn that append to X-Forwarded-For (Railway's
+    # edge: 1). Throttles key on the entry the outermost of them added; set 0
+    # when clients connect directly so the header is ignored entirely.
+    "NUM_PROXIES": env.int("NUM_PROXIES", default=1),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 
 # --------------------------
 # CACHES
 # --------------------------
+# Per-process LocMemCache by default; set CACHE_URL (e.g. redis://...) to share
+# results, throttles and idempotency keys across workers and containers.
 CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "polls-cache",
-    }
+    "default": env.cache("CACHE_URL", default="locmemcache://polls-cache"),
 }
 
+# --------------------------
+# ADMISSION CONTROL
+# --------------------------
+# Per gunicorn worker (4 threads each): concurrent requests per route class,
+# how many may wait for a slot and for how long, and the Retry-After of the
+# 503 returned beyond that. Classes are listed in api/admission.py; a class
+# without an entry (by default "vote" and "read") isn't limited. Waiting
+# requests hold a thread as well, so a limited class keeps concurrency +
+# queue below the thread count and always leaves threads for the others.
+ADMISSION_CONTROL = env.bool("ADMISSION_CONTROL", default=True)
+ADMISSION_LIMITS = env.json("ADMISSION_LIMITS", default={
+    "heavy": {"concurrency": 2, "queue": 1, "timeout": 1.0, "retry_after": 5},
+    "auth": {"concurrency": 2, "queue": 1, "timeout": 1.0, "retry_after": 2},
+})
+
+# --------------------------
+# PROFILING
+# --------------------------
+# Admins can profile a single request by sending this header; a sample of all
+# requests can also be profiled. Profiles and their SQL land in PROFILING_DIR,
+# which keeps only the newest PROFILING_MAX_FILES of them.
+PROFILING_HEADER = env("PROFILING_HEADER", default="X-Profile")
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.0)
+PROFILING_DIR = env("PROFILING_DIR", default=os.path.join(BASE_DIR, "profiles"))
+PROFILING_MAX_FILES = env.int("PROFILING_MAX_FILES", default=200)
+
+# Queries slower than this are aggregated by shape in the SlowQuery table
+# (admin page, `manage.py slow_queries`), with their call site and EXPLAIN plan.
+SLOW_QUERY_LOG = env.bool("SLOW_QUERY_LOG", default=True)
+SLOW_QUERY_THRESHOLD_MS = env.float("SLOW_QUERY_THRESHOLD_MS", default=200.0)
+
 # --------------------------
 # CUSTOM USER MODEL
 # --------------------------
@@ -1,8 +1,63 @@
 from django.contrib import admin
+
+from api.admin import FastChangeListMixin
+from . import search
 from .models import Poll, Option, Vote
-# Register your models here.
 
 
-admin.site.register(Poll)
-admin.site.register(Option)
-admin.site.register(Vote)
\ No newline at end of file
+@admin.register(Poll)
+class PollAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("title", "created_by", "created_at", "expires_at", "vote_count")
+    list_select_related = ("created_by",)
+    autocomplete_fields = ("created_by",)
+    readonly_fields = ("vote_count", "trending_score")
+    search_fields = ("title", "description")
+    search_help_text = "Full-text search over title and description."
+
+    def get_search_results(self, request, queryset, search_term):
+        # Served by the full-text index (polls.search) instead of LIKE '%term%'.
+        return search.search_polls(queryset, search_term), False
+
+
+@admin.register(Option)
+class OptionAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("text", "poll")
+    list_select_related = ("poll",)  # Option.__str__ uses poll.title
+    autocomplete_fields = ("poll",)
+    search_fields = ("poll__id",)
+    search_help_text = "Poll id."
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term.isdigit():
+            return queryset.filter(poll_id=int(term)), False
+        return (queryset.none() if term else queryset), False
+
+
+@admin.register(Vote)
+class VoteAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("user", "poll", "option_text", "timestamp")
+    list_select_related = ("user", "poll", "option")  # Vote.__str__ uses user.email and option.text
+    raw_id_fields = ("user", "poll", "option")
+    readonly_fields = ("timestamp",)
+    search_fields = ("user__email",)
+    search_help_text = "Poll id, or a voter's exact email address."
+
+    def get_search_results(self, request, queryset, search_term):
+        # Only lookups that hit an index: poll FK or the unique email.
+        term = search_term.strip()
+        if term.isdigit():
+            return queryset.filter(poll_id=int(term)), False
+        if term:
+            return queryset.filter(user__email=term), False
+        return queryset, False
+
+    @admin.display(description="Option", ordering="option__text")
+    def option_text(self, obj):
+        # Option.__str__ would also need option.poll; the text is enough here.
+        return obj.option.text
+
+    def delete_queryset(self, request, queryset):
+        # Row by row, so Vote.delete() keeps tallies and counters in step.
+        for vote in queryset:
+            vote.delete()
@@ -0,0 +1,148 @@
+"""
+Poll results broken down by a voter attribute (GET /polls/{id}/results/?by=...).
+
+- role:   the voter's role
+- cohort: the month the voter signed up ("YYYY-MM")
+- day:    the day the vote was cast ("YYYY-MM-DD")
+
+A cross-tab is computed with one grouped query (votes per segment and
+option; multi/ranked votes count under their first choice) and cached
+under the poll's version, so editing the poll or its options orphans it.
+While the poll is open, votes patch the cached cross-tabs in place (see
+events) instead of forcing a recompute; closed polls no longer change and
+keep theirs for a day. Patches keep an entry's original expiry, so any
+drift from concurrent patches is bounded by OPEN_POLL_TIMEOUT.
+"""
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from . import poll_meta
+from .models import Vote
+
+DIMENSIONS = ("role", "cohort", "day")
+OPEN_POLL_TIMEOUT = 60 * 10
+CLOSED_POLL_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(poll_id, by, version):
+    return f"poll_breakdown:{poll_id}:{by}:{version}"
+
+
+def _segment_expression(by):
+    return {
+        "role": F("user__role"),
+        "cohort": TruncMonth("user__date_joined"),
+        "day": TruncDate("timestamp"),
+    }[by]
+
+
+def _format_segment(by, value):
+    if value is None:
+        return None
+    if by == "cohort":
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime("%Y-%m")
+    if by == "day":
+        return value.isoformat()
+    return value
+
+
+def _vote_segment(by, vote, user):
+    if by == "day":
+        return timezone.localtime(vote.timestamp).date().isoformat()
+    if by == "cohort":
+        return _format_segment(by, user.date_joined)
+    return user.role
+
+
+def compute(poll_id, by):
+    """{segment: {option_id (str): votes}} from one grouped query."""
+    rows = (
+        Vote.objects.filter(poll_id=poll_id)
+        .annotate(segment=_segment_expression(by))
+        .values("segment", "option_id")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    crosstab = {}
+    for row in rows:
+        segment = _format_segment(by, row["segment"])
+        crosstab.setdefault(segment, {})[str(row["option_id"])] = row["n"]
+    return crosstab
+
+
+def _store(key, crosstab, expires_at):
+    timeout = expires_at - time.time()
+    if timeout > 0:
+        cache.set(key, {"crosstab": crosstab, "expires_at": expires_at}, timeout)
+
+
+def get(poll_id, by):
+    """Cached cross-tab as a JSON-ready dict."""
+    key = _cache_key(poll_id, by, poll_meta.version(poll_id))
+    entry = cache.get(key)
+    if entry is not None:
+        crosstab = entry["crosstab"]
+    else:
+        crosstab = compute(poll_id, by)
+        meta = poll_meta.get(poll_id)
+        closed = meta is not None and meta.expires_at and meta.expires_at <= timezone.now()
+        _store(key, crosstab, time.time() + (CLOSED_POLL_TIMEOUT if closed else OPEN_POLL_TIMEOUT))
+    return {
+        "by": by,
+        "segments": [
+            {"segment": segment, "total": sum(options.values()), "options": options}
+            for segment, options in sorted(crosstab.items(), key=lambda item: str(item[0]))
+        ],
+    }
+
+
+def apply(votes, sign=1, previous_option_ids=None):
+    """
+    Add (sign=1) or remove (sign=-1) `votes` in whichever cached cross-tabs
+    exist; `previous_option_ids` ({vote.pk: option_id}) moves changed votes.
+    Users are read from the votes when loaded, else in one query.
+    """
+    from django.contrib.auth import get_user_model
+
+    by_poll = {}
+    for vote in votes:
+        by_poll.setdefault(vote.poll_id, []).append(vote)
+
+    for poll_id, poll_votes in by_poll.items():
+        version = poll_meta.version(poll_id)
+        keys = {by: _cache_key(poll_id, by, version) for by in DIMENSIONS}
+        cached = cache.get_many(keys.values())
+        if not cached:
+            continue
+
+        user_field = Vote._meta.get_field("user")
+        users = {}
+        if cached.keys() - {keys["day"]}:  # role/cohort need the voters
+            missing = {v.user_id for v in poll_votes if not user_field.is_cached(v)}
+            users = {u.pk: u for u in get_user_model().objects.filter(pk__in=missing).only("role", "date_joined")}
+
+        for by, key in keys.items():
+            entry = cached.get(key)
+            if entry is None:
+                continue
+            crosstab = entry["crosstab"]
+            deltas = Counter()
+            for vote in poll_votes:
+                user = vote.user if user_field.is_cached(vote) else users.get(vote.user_id)
+                if user is None and by != "day":
+                    continue
+                segment = _vote_segment(by, vote, user)
+                if previous_option_ids is not None:
+                    deltas[(segment, str(previous_option_ids[vote.pk]))] -= 1
+                deltas[(segment, str(vote.option_id))] += sign
+            for (segment, option_id), delta in deltas.items():
+                options = crosstab.setdefault(segment, {})
+                options[option_id] = max(0, options.get(option_id, 0) + delta)
+            _store(key, crosstab, entry["expires_at"])
@@ -0,0 +1,175 @@
+"""
+Incremental columnar export of votes for offline analytics.
+
+Each run appends the votes cast since the previous run to date-partitioned
+files under the export directory:
+
+    <dir>/votes/date=YYYY-MM-DD/votes-<first vote id>.parquet   (or .arrow)
+    <dir>/_watermark.json                                        {"timestamp": ..., "id": ...}
+
+Votes are read in (timestamp, id) order with keyset pagination, BATCH_SIZE
+rows per query, each a range scan of the Vote (timestamp, id) index, and
+each batch is written as one record batch / row group, so memory is
+bounded by one batch however far behind the export is. Since
+rows arrive in timestamp order, partitions fill one after the other: a
+file is written under a `.partial` name, renamed when its day is done, and
+only then does the watermark move past it. An interrupted run therefore
+resumes from the last complete file.
+
+Votes younger than LAG seconds are left for the next run, so a
+transaction that commits a little after its timestamp isn't skipped.
+
+Needs pyarrow (optional: `pip install pyarrow`); the web app never imports
+this module.
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Vote
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+BATCH_SIZE = 50_000
+LAG = 60  # seconds
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+COLUMNS = ("id", "poll_id", "option_id", "user_id", "choices", "timestamp")
+_ID, _TIMESTAMP = COLUMNS.index("id"), COLUMNS.index("timestamp")
+WATERMARK_FILE = "_watermark.json"
+
+
+def schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("poll_id", pa.int64()),
+        ("option_id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("choices", pa.list_(pa.int64())),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def export_dir():
+    return Path(settings.ANALYTICS_EXPORT_DIR)
+
+
+def read_watermark(directory):
+    """(timestamp, id) of the last exported vote, or None before the first run."""
+    path = Path(directory) / WATERMARK_FILE
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text())
+    return datetime.fromisoformat(data["timestamp"]), data["id"]
+
+
+def write_watermark(directory, timestamp, vote_id):
+    path = Path(directory) / WATERMARK_FILE
+    partial = path.with_name(path.name + ".partial")
+    partial.write_text(json.dumps({"timestamp": timestamp.isoformat(), "id": vote_id}))
+    os.replace(partial, path)
+
+
+def _after(timestamp, vote_id):
+    # The leading range on timestamp lets (timestamp, id) be read in index order
+    return Q(timestamp__gte=timestamp) & (Q(timestamp__gt=timestamp) | Q(id__gt=vote_id))
+
+
+def pending_votes(watermark, until):
+    """Votes after `watermark` and before `until`, in (timestamp, id) order: a vote_timestamp_id_idx range scan."""
+    qs = Vote.objects.filter(timestamp__lt=until)
+    if watermark is not None:
+        qs = qs.filter(_after(*watermark))
+    return qs.order_by("timestamp", "id")
+
+
+def vote_batches(watermark, until, batch_size=BATCH_SIZE):
+    """Yield lists of vote rows (COLUMNS order) after `watermark` and before `until`."""
+    while True:
+        rows = list(pending_votes(watermark, until).values_list(*COLUMNS)[:batch_size])
+        if not rows:
+            return
+        yield rows
+        watermark = (rows[-1][_TIMESTAMP], rows[-1][_ID])
+
+
+def _record_batch(rows):
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema())],
+        schema=schema(),
+    )
+
+
+def _utc_day(row):
+    return row[_TIMESTAMP].astimezone(dt_timezone.utc).date()
+
+
+class _PartitionWriter:
+    """Writes one day's file under a .partial name; publish() renames it into place."""
+
+    def __init__(self, directory, day, first_id, fmt):
+        folder = Path(directory) / "votes" / f"date={day.isoformat()}"
+        folder.mkdir(parents=True, exist_ok=True)
+        self.day = day
+        self.path = folder / f"votes-{first_id}{FORMATS[fmt]}"
+        self.partial = self.path.with_name(self.path.name + ".partial")
+        if fmt == "parquet":
+            self.writer = pa.parquet.ParquetWriter(self.partial, schema(), compression="zstd")
+        else:
+            self.writer = pa.ipc.new_file(str(self.partial), schema())
+        self.last = None
+
+    def write(self, rows):
+        self.writer.write_batch(_record_batch(rows))
+        self.last = (rows[-1][_TIMESTAMP], rows[-1][_ID])
+
+    def close(self):
+        self.writer.close()
+
+    def publish(self):
+        self.close()
+        os.replace(self.partial, self.path)
+
+
+def export(directory=None, fmt="parquet", batch_size=BATCH_SIZE, lag=LAG):
+    """Append votes newer than the watermark. Returns {"votes": n, "files": [paths]}."""
+    if pa is None:
+        raise ImportError("The columnar export needs pyarrow: pip install pyarrow")
+    directory = Path(directory or export_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    until = timezone.now() - timedelta(seconds=lag)
+
+    def publish(writer):
+        writer.publish()
+        write_watermark(directory, *writer.last)
+        files.append(writer.path)
+
+    writer, files, total = None, [], 0
+    try:
+        for rows in vote_batches(read_watermark(directory), until, batch_size):
+            for day, day_rows in groupby(rows, key=_utc_day):
+                day_rows = list(day_rows)
+                if writer is not None and writer.day != day:
+                    publish(writer)
+                    writer = None
+                if writer is None:
+                    writer = _PartitionWriter(directory, day, day_rows[0][_ID], fmt)
+                writer.write(day_rows)
+                total += len(day_rows)
+        if writer is not None:
+            publish(writer)
+            writer = None
+    finally:
+        if writer is not None:  # interrupted: the next run overwrites the .partial
+            writer.close()
+    return {"votes": total, "files": files}
@@ -0,0 +1,129 @@
+"""
+Hooks run after votes are written, so every write path (single vote,
+admin, bulk inserts) keeps derived counters and caches in step.
+
+`Vote.save()` / `Vote.delete()` / `Vote.change_option()` call these for
+single rows; code that bypasses them (e.g. `bulk_create`) must call
+`votes_cast` itself. Deletes that bypass `Vote.delete()` (cascades from a
+deleted user, `QuerySet.delete()`) can't be hooked cheaply per row;
+`recount_tallies` (also a management command) recomputes the counters
+from the Vote table instead.
+"""
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from . import breakdown, poll_meta, response_cache, results, rollups, sketches, trending
+from .models import Option, Poll, Vote
+
+RECOUNT_BATCH_SIZE = 1000  # polls per transaction
+
+
+def _adjust_tallies(poll_id, deltas):
+    """
+    Apply {option_id: +n/-n} to Option.vote_count, then on commit patch the
+    cached results and drop the poll's cached anonymous responses.
+    """
+    for option_id, delta in deltas.items():
+        if delta > 0:
+            Option.objects.filter(pk=option_id).update(vote_count=F("vote_count") + delta)
+        elif delta < 0:
+            Option.objects.filter(pk=option_id, vote_count__gte=-delta).update(
+                vote_count=F("vote_count") + delta
+            )
+    option_ids = list(deltas)
+    transaction.on_commit(lambda: results.patch_cached(poll_id, option_ids))
+    transaction.on_commit(lambda: response_cache.invalidate(poll_id))
+
+
+def votes_cast(votes):
+    """Update derived state for newly inserted votes."""
+    by_poll = defaultdict(list)
+    for vote in votes:
+        by_poll[vote.poll_id].append(vote)
+
+    for poll_id, poll_votes in by_poll.items():
+        latest = max(vote.timestamp for vote in poll_votes)
+        trending.record_votes(poll_id, len(poll_votes), latest)
+        _adjust_tallies(
+            poll_id, Counter(option_id for vote in poll_votes for option_id in vote.counted_option_ids())
+        )
+
+    rollups.record(votes)
+    transaction.on_commit(lambda: breakdown.apply(votes))
+    transaction.on_commit(lambda: sketches.record(votes))
+
+
+def vote_changed(vote, previous_option_id, previous_counted_ids):
+    """
+    A vote changed its picks (same poll): its first pick was
+    `previous_option_id` and it counted towards `previous_counted_ids`.
+    """
+    deltas = Counter(vote.counted_option_ids())
+    deltas.subtract(previous_counted_ids)
+    _adjust_tallies(vote.poll_id, {option_id: delta for option_id, delta in deltas.items() if delta})
+    if vote.option_id != previous_option_id:  # rollups and cross-tabs count the first pick
+        rollups.move(vote, previous_option_id)
+        transaction.on_commit(lambda: breakdown.apply([vote], previous_option_ids={vote.pk: previous_option_id}))
+
+
+def vote_removed(vote):
+    """Update derived state after a vote row is deleted."""
+    trending.remove_vote(vote.poll_id)
+    _adjust_tallies(vote.poll_id, {option_id: -1 for option_id in vote.counted_option_ids()})
+    rollups.remove([vote])
+    transaction.on_commit(lambda: breakdown.apply([vote], sign=-1))
+
+
+def _recount_batch(poll_ids):
+    """Recount one batch of polls, with their rows locked against concurrent vote hooks."""
+    polls = dict(Poll.objects.select_for_update().filter(pk__in=poll_ids).values_list("id", "kind"))
+    votes = Vote.objects.filter(poll_id__in=polls).order_by()
+    voters = dict(votes.values_list("poll_id").annotate(n=Count("id")))
+
+    multi = [poll_id for poll_id, kind in polls.items() if kind == Poll.Kind.MULTI]
+    picks = Counter(dict(votes.exclude(poll_id__in=multi).values_list("option_id").annotate(n=Count("id"))))
+    for option_id, choices in votes.filter(poll_id__in=multi).values_list("option_id", "choices").iterator():
+        picks.update(choices if len(choices) > 1 else [option_id])  # as Vote.counted_option_ids()
+
+    stale_polls = [
+        Poll(pk=poll_id, vote_count=voters.get(poll_id, 0))
+        for poll_id, vote_count in Poll.objects.filter(pk__in=polls).values_list("id", "vote_count")
+        if vote_count != voters.get(poll_id, 0)
+    ]
+    stale_options = [
+        Option(pk=option_id, poll_id=poll_id, vote_count=picks[option_id])
+        for option_id, poll_id, vote_count in Option.objects.filter(poll_id__in=polls)
+        .values_list("id", "poll_id", "vote_count")
+        if vote_count != picks[option_id]
+    ]
+    Poll.objects.bulk_update(stale_polls, ["vote_count"])
+    Option.objects.bulk_update(stale_options, ["vote_count"])
+    return {poll.pk for poll in stale_polls} | {option.poll_id for option in stale_options}
+
+
+def recount_tallies(poll_ids=None, batch_size=RECOUNT_BATCH_SIZE):
+    """
+    Recompute Poll.vote_count and Option.vote_count from the Vote table for
+    `poll_ids` (default: every poll) and drop the cached results of the
+    polls that were off. Returns the ids of those polls.
+    """
+    polls = Poll.objects.order_by("id").values_list("id", flat=True)
+    if poll_ids is not None:
+        polls = polls.filter(pk__in=poll_ids)
+
+    changed, last_id = set(), 0
+    while True:
+        batch = list(polls.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1]
+        with transaction.atomic():
+            changed |= _recount_batch(batch)
+
+    for poll_id in changed:
+        cache.delete(results.cache_key(poll_id))
+        poll_meta.invalidate(poll_id)  # new version: cached breakdowns and responses are orphaned
+    return changed
@@ -0,0 +1,82 @@
+"""
+HyperLogLog: approximate distinct counts in a fixed 2 KB, mergeable sketch.
+
+With P = 11 (2048 one-byte registers) the standard error of `count()` is
+1.04 / sqrt(2048) ≈ 2.3%, so ~95% of estimates fall within ±4.6% and ~99.7%
+within ±6.9%, however many values were added. The union of any number of
+sketches (register-wise max) has the same error bound, which is what makes
+"distinct voters across these polls/days" cheap.
+
+Serialized sketches are zlib-compressed; sparse ones (few voters) take a
+few dozen bytes.
+"""
+import hashlib
+import math
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - pure-Python path below
+    np = None
+
+P = 11
+M = 1 << P
+ALPHA = 0.7213 / (1 + 1.079 / M)
+RELATIVE_ERROR = 1.04 / math.sqrt(M)
+
+_HASH_BITS = 64
+_RANK_BITS = _HASH_BITS - P
+_INVERSE_POWERS = [2.0 ** -r for r in range(_RANK_BITS + 2)]
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    __slots__ = ("registers",)
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers is not None else bytearray(M)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(zlib.decompress(data))
+
+    def to_bytes(self):
+        return zlib.compress(bytes(self.registers))
+
+    def add(self, value):
+        """Add a value; returns True if the sketch changed."""
+        h = _hash(value)
+        index = h >> _RANK_BITS
+        rank = _RANK_BITS - (h & ((1 << _RANK_BITS) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        estimate = ALPHA * M * M / sum(_INVERSE_POWERS[r] for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * M and zeros:
+            estimate = M * math.log(M / zeros)  # linear counting for small cardinalities
+        return round(estimate)
+
+
+def union(sketches):
+    """Merge many sketches into a new one (vectorized when NumPy is available)."""
+    sketches = list(sketches)
+    if not sketches:
+        return HyperLogLog()
+    if np is not None:
+        stacked = np.frombuffer(b"".join(bytes(s.registers) for s in sketches), dtype=np.uint8)
+        return HyperLogLog(stacked.reshape(len(sketches), M).max(axis=0).tobytes())
+    merged = HyperLogLog(sketches[0].registers)
+    for sketch in sketches[1:]:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,99 @@
+"""
+Idempotency-Key support for retry-prone POST endpoints (e.g. voting).
+
+The first successful response for (user, scope, key) is stored in the cache
+for IDEMPOTENCY_TTL; retries with the same key are answered from the cache
+without running the handler. Concurrent duplicates are collapsed with a
+short cache lock: the loser waits briefly for the winner's response.
+Failed requests are not stored, so they can simply be retried.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL = 60 * 60 * 24  # 24 hours
+LOCK_TIMEOUT = 10  # seconds; upper bound for one handler run
+WAIT_TIMEOUT = 2.0
+WAIT_INTERVAL = 0.05
+MAX_KEY_LENGTH = 255
+
+
+def _cache_key(user_id, scope, key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"idempotency:{scope}:{user_id}:{digest}"
+
+
+def _fingerprint(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _replay(stored, fingerprint):
+    if stored["fingerprint"] != fingerprint:
+        return Response(
+            {"error": f"{IDEMPOTENCY_HEADER} was already used with a different request body."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(stored["data"], status=stored["status"])
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _wait_for(cache_key):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return stored
+    return None
+
+
+def run_idempotent(request, scope, handler):
+    """
+    Run `handler()` (returning a DRF Response) at most once per
+    Idempotency-Key. Without the header, just runs the handler.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return handler()
+    if len(key) > MAX_KEY_LENGTH:
+        return Response(
+            {"error": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    cache_key = _cache_key(request.user.pk, scope, key)
+    fingerprint = _fingerprint(request.data)
+
+    stored = cache.get(cache_key)
+    if stored is not None:
+        return _replay(stored, fingerprint)
+
+    lock_key = f"{cache_key}:lock"
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        stored = _wait_for(cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+        response = Response(
+            {"error": "A request with this Idempotency-Key is still in progress."},
+            status=status.HTTP_409_CONFLICT,
+        )
+        response["Retry-After"] = "1"
+        return response
+
+    try:
+        response = handler()
+        if status.is_success(response.status_code):
+            cache.set(
+                cache_key,
+                {"status": response.status_code, "data": response.data, "fingerprint": fingerprint},
+                IDEMPOTENCY_TTL,
+            )
+        return response
+    finally:
+        cache.delete(lock_key)
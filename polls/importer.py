@@ -0,0 +1,185 @@
+"""
+Bulk import of poll definitions from JSON or JSONL.
+
+Input is either a JSON array of poll objects or one poll object per line:
+    {"title": "...", "description": "...", "expires_at": "...", "options": ["A", "B"]}
+
+Records are parsed incrementally (never the whole file in memory),
+validated one by one with CreatePollSerializer, and written in chunks:
+one bulk_create for the chunk's polls (to get their ids), then one for
+all of their options.
+"""
+import codecs
+import json
+
+from django.db import connection, transaction
+
+from . import response_cache, search
+from .models import Option, Poll
+from .serializers import CreatePollSerializer
+
+IMPORT_CHUNK_SIZE = 500
+READ_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+MAX_RECORD_SIZE = 1024 * 1024  # characters; a longer record is treated as malformed
+
+
+class ImportFormatError(ValueError):
+    """The input isn't valid JSON / JSONL (as opposed to an invalid record)."""
+
+
+def _iter_json_array(chunks, buffer):
+    """
+    Decode elements in place at offset `pos`; the buffer is only rebuilt
+    (dropping what has been parsed) when an element runs past its end.
+    """
+    decoder = json.JSONDecoder()
+    pos = buffer.index("[") + 1
+    while True:
+        # Skip whitespace and separators between elements
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                break
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ImportFormatError("Unterminated JSON array.")
+            buffer, pos = chunk, 0
+
+        if buffer[pos] == "]":
+            return
+
+        while True:
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError as exc:
+                # Incomplete or malformed: read on, but not past MAX_RECORD_SIZE
+                if len(buffer) - pos > MAX_RECORD_SIZE:
+                    raise ImportFormatError(
+                        f"Invalid JSON, or a record longer than {MAX_RECORD_SIZE} characters: {exc}"
+                    ) from exc
+                chunk = next(chunks, None)
+                if chunk is None:
+                    raise ImportFormatError(f"Invalid JSON: {exc}") from exc
+                buffer, pos = buffer[pos:] + chunk, 0
+        yield record
+
+
+def _iter_json_lines(chunks, buffer):
+    line_no = 0
+    while True:
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise ImportFormatError(f"Line {line_no}: invalid JSON: {exc}") from exc
+        if len(buffer) > MAX_RECORD_SIZE:
+            raise ImportFormatError(f"Line {line_no + 1}: longer than {MAX_RECORD_SIZE} characters.")
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        buffer += chunk
+    if buffer.strip():
+        try:
+            yield json.loads(buffer)
+        except json.JSONDecodeError as exc:
+            raise ImportFormatError(f"Line {line_no + 1}: invalid JSON: {exc}") from exc
+
+
+def iter_records(chunks):
+    """
+    Yield poll records from an iterable of text chunks, detecting
+    JSON array vs. JSONL from the first non-blank character.
+    """
+    chunks = iter(chunks)
+    buffer = ""
+    while not buffer.strip():
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        buffer += chunk
+    if buffer.lstrip().startswith("["):
+        yield from _iter_json_array(chunks, buffer)
+    else:
+        yield from _iter_json_lines(chunks, buffer)
+
+
+def read_text_chunks(fileobj, size=READ_SIZE):
+    """Decode a binary file object into UTF-8 text chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    while True:
+        data = fileobj.read(size)
+        if not data:
+            break
+        yield decoder.decode(data)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _flush(batch, created_by):
+    """Insert one chunk of validated records. Returns the number of polls created."""
+    polls = []
+    for data in batch:
+        poll = Poll(created_by=created_by, **{k: v for k, v in data.items() if k != "options"})
+        poll.fill_defaults()
+        polls.append(poll)
+
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Poll.objects.bulk_create(polls)
+        else:  # e.g. MySQL: bulk_create can't hand back the new ids
+            for poll in polls:
+                poll.save()
+        Option.objects.bulk_create([
+            Option(poll=poll, text=option["text"])
+            for poll, data in zip(polls, batch)
+            for option in data["options"]
+        ])
+    search.index_polls(polls)
+    response_cache.invalidate_list()
+    return len(polls)
+
+
+def import_polls(records, created_by, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validate and insert poll records. Invalid records are skipped and
+    reported as {"record": <0-based index>, "errors": {...}}.
+
+    Imports aren't atomic: chunks are committed as they fill up. If the
+    input turns out to be malformed partway through, every valid record
+    before that point is still imported, and the report adds
+    "format_error" and "records_read" (how many records were parsed), so
+    a retry can skip those records rather than import them twice.
+    """
+    created, errors, batch = 0, [], []
+    error_count = read = 0
+    report = {}
+
+    try:
+        for index, record in enumerate(records):
+            read = index + 1
+            serializer = CreatePollSerializer(data=record) if isinstance(record, dict) else None
+            if serializer is None or not serializer.is_valid():
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    detail = serializer.errors if serializer else {"non_field_errors": ["Expected a JSON object."]}
+                    errors.append({"record": index, "errors": detail})
+                continue
+
+            batch.append(serializer.validated_data)
+            if len(batch) >= chunk_size:
+                created += _flush(batch, created_by)
+                batch = []
+    except ImportFormatError as exc:  # raised by the parser, between records
+        report = {"format_error": str(exc), "records_read": read}
+
+    if batch:
+        created += _flush(batch, created_by)
+
+    return {"created": created, "failed": error_count, "errors": errors, **report}
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from polls import retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive polls expired more than --days days ago to gzip JSONL, then delete them "
+        "in small throttled batches. Safe to re-run: archived polls are only purged further."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365, help="Only polls expired longer ago than this")
+        parser.add_argument("--archive-dir", default=None, help="Defaults to settings.POLL_ARCHIVE_DIR")
+        parser.add_argument("--batch-size", type=int, default=retention.BATCH_SIZE)
+        parser.add_argument("--sleep", type=float, default=retention.PAUSE, help="Seconds to pause between batches")
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many polls")
+        parser.add_argument("--dry-run", action="store_true", help="List the polls that would be archived")
+
+    def handle(self, *args, **options):
+        directory = options["archive_dir"] or retention.archive_dir()
+        polls = retention.expired_polls(options["days"])
+        if options["limit"]:
+            polls = polls[: options["limit"]]
+
+        if options["dry_run"]:
+            for poll in polls:
+                self.stdout.write(f"poll {poll.pk}: {poll.title!r}, expired {poll.expires_at:%Y-%m-%d}, {poll.vote_count} votes")
+            return
+
+        purged = 0
+        for poll in list(polls):  # small rows; not a cursor held open across the deletes
+            archived, deleted = retention.purge_poll(poll, directory, options["batch_size"], options["sleep"])
+            note = "already archived" if archived is None else f"archived {archived} votes"
+            self.stdout.write(f"poll {poll.pk}: {note}, deleted {deleted} votes")
+            purged += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Archived and purged {purged} polls into {directory}."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from polls import rollups
+
+
+class Command(BaseCommand):
+    help = "Downsample old vote rollup buckets (minute → hour → day). Run periodically, e.g. hourly from cron."
+
+    def handle(self, *args, **options):
+        written = rollups.compact()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Compacted rollups: {written[rollups.Resolution.HOUR]} hour buckets, "
+            f"{written[rollups.Resolution.DAY]} day buckets written."
+        ))
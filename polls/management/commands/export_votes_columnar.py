@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls import columnar
+
+
+class Command(BaseCommand):
+    help = (
+        "Append votes cast since the last run to date-partitioned Parquet/Arrow files "
+        "for offline analytics. Run periodically, e.g. every few minutes from cron. Needs pyarrow."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output-dir", default=None, help="Defaults to settings.ANALYTICS_EXPORT_DIR")
+        parser.add_argument("--format", choices=sorted(columnar.FORMATS), default="parquet")
+        parser.add_argument("--batch-size", type=int, default=columnar.BATCH_SIZE)
+        parser.add_argument(
+            "--lag", type=int, default=columnar.LAG, help="Leave votes younger than this many seconds for the next run"
+        )
+
+    def handle(self, *args, **options):
+        if columnar.pa is None:
+            raise CommandError("The columnar export needs pyarrow: pip install pyarrow")
+
+        result = columnar.export(
+            options["output_dir"], options["format"], options["batch_size"], options["lag"],
+        )
+        for path in result["files"]:
+            self.stdout.write(f"wrote {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Exported {result['votes']} votes into {len(result['files'])} files."
+        ))
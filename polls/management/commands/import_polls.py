@@ -0,0 +1,49 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.importer import IMPORT_CHUNK_SIZE, import_polls, iter_records, read_text_chunks
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Bulk-import polls and their options from a JSON array or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON or JSONL file ('-' for stdin)")
+        parser.add_argument("--created-by", required=True, help="Email of the admin who will own the polls")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Polls per bulk insert")
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(email=options["created_by"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['created_by']!r}.")
+
+        path = options["path"]
+        try:
+            if path == "-":
+                report = self._import(sys.stdin.buffer, owner, options)
+            else:
+                with open(path, "rb") as fileobj:
+                    report = self._import(fileobj, owner, options)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in report["errors"]:
+            self.stderr.write(f"record {error['record']}: {json.dumps(error['errors'])}")
+        if "format_error" in report:
+            raise CommandError(
+                f"{report['format_error']} Imported {report['created']} polls from the first "
+                f"{report['records_read']} records; skip those when retrying."
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Imported {report['created']} polls ({report['failed']} invalid records skipped)."
+        ))
+
+    def _import(self, fileobj, owner, options):
+        records = iter_records(read_text_chunks(fileobj))
+        return import_polls(records, owner, chunk_size=options["chunk_size"])
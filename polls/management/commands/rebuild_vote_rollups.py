@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from polls import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the vote time-series rollups from the Vote table "
+        "(backfill, or after a bulk load that skipped the vote hooks)."
+    )
+
+    def handle(self, *args, **options):
+        written = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {written} vote rollup buckets."))
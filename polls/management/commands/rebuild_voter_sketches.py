@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from polls import sketches
+from polls.models import Vote, VoterSketch
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the distinct-voter HyperLogLog sketches from the Vote table "
+        "(backfill, or after a bulk load that skipped the vote hooks)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--keep", action="store_true", help="Merge into existing sketches instead of clearing them")
+
+    def handle(self, *args, **options):
+        if not options["keep"]:
+            VoterSketch.objects.all().delete()
+
+        batch, total = [], 0
+        votes = Vote.objects.only("user_id", "poll_id", "timestamp").order_by()
+        for vote in votes.iterator(chunk_size=options["batch_size"]):
+            batch.append(vote)
+            if len(batch) >= options["batch_size"]:
+                sketches.record(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            sketches.record(batch)
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Folded {total} votes into {VoterSketch.objects.count()} voter sketches."
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from polls import events
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute poll and option vote counts from the Vote table "
+        "(after deletes that skipped Vote.delete(), e.g. a deleted user's votes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll", type=int, action="append", dest="polls", help="Only this poll (repeatable)")
+
+    def handle(self, *args, **options):
+        changed = events.recount_tallies(options["polls"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Recounted tallies; corrected {len(changed)} polls."))
@@ -0,0 +1,80 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.models import Poll
+from polls.poll_meta import cache_is_process_local
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-compute results and list pages for the most active unexpired polls, "
+        "by replaying anonymous GETs through the normal request path, as clients "
+        "of PUBLIC_URL send them (cached pages embed the host in their links)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--polls", type=int, default=50, help="How many of the most-voted active polls to warm")
+        parser.add_argument("--pages", type=int, default=3, help="How many poll-list pages to warm")
+        parser.add_argument("--url", default=settings.PUBLIC_URL, help="Public scheme and host (default PUBLIC_URL)")
+        parser.add_argument("--concurrency", type=int, default=4, help="Max requests in flight")
+        parser.add_argument(
+            "--skip-local-cache",
+            action="store_true",
+            help="Do nothing if the cache is per-process (LocMemCache); use when running outside the workers",
+        )
+
+    def handle(self, *args, **options):
+        if options["skip_local_cache"] and cache_is_process_local():
+            self.stdout.write("Cache is per-process; skipping warm-up (workers warm their own cache).")
+            return
+
+        public = urlsplit(options["url"])
+        self.host, self.secure = public.netloc, public.scheme == "https"
+
+        started = time.monotonic()
+        active = Poll.objects.filter(expires_at__gt=timezone.now())
+        poll_ids = list(active.order_by("-vote_count", "-id").values_list("id", flat=True)[: options["polls"]])
+
+        page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        listed = active[: options["pages"] * page_size].count()
+        list_url = reverse("poll-list")
+        pages = range(2, math.ceil(listed / page_size) + 1)
+        urls = [list_url] + [f"{list_url}?page={page}" for page in pages]  # the first page has no ?page=
+        for poll_id in poll_ids:
+            urls.append(reverse("poll-results", kwargs={"pk": poll_id}))
+            urls.append(reverse("poll-detail", kwargs={"pk": poll_id}))
+
+        if options["concurrency"] > 1:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                statuses = list(pool.map(self._fetch_in_thread, urls))
+        else:
+            statuses = [self._fetch(url) for url in urls]
+
+        failed = [url for url, code in zip(urls, statuses) if code != 200]
+        elapsed = time.monotonic() - started
+        for url in failed:
+            self.stderr.write(f"warm-up failed: {url}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Warmed {len(urls) - len(failed)}/{len(urls)} URLs for {len(poll_ids)} polls in {elapsed:.2f}s."
+        ))
+
+    def _fetch(self, url):
+        try:
+            return Client(HTTP_HOST=self.host).get(url, secure=self.secure).status_code
+        except Exception:  # a failed warm-up must never take the worker down
+            return None
+
+    def _fetch_in_thread(self, url):
+        try:
+            return self._fetch(url)
+        finally:
+            connections.close_all()  # this thread's connections only
@@ -0,0 +1,54 @@
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+from . import response_cache
+
+CACHED_ROUTES = {"poll-list", "poll-detail"}
+
+
+class AnonymousResponseCacheMiddleware:
+    """
+    Serve anonymous GETs of the poll list and poll detail from the
+    rendered-response cache (see polls/response_cache.py). Responses carry
+    X-Cache: HIT or MISS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = self._cache_key(request)
+        if key is None:
+            return self.get_response(request)
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            response = HttpResponse(cached["content"], status=cached["status"])
+            for name, value in cached["headers"]:
+                response[name] = value
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = self.get_response(request)
+        if (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and response.get("Content-Type", "").startswith("application/json")
+        ):
+            response_cache.store(key, response)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def _cache_key(self, request):
+        if request.method not in ("GET", "HEAD") or not response_cache.is_anonymous(request):
+            return None
+        if not response_cache.accepts_json(request):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.url_name not in CACHED_ROUTES or "format" in match.kwargs:
+            return None
+        return response_cache.cache_key(request, match.kwargs.get("pk"))
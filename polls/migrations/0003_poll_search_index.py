@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# Keep in sync with polls.search.PG_DOCUMENT
+PG_DOCUMENT = (
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', description), 'B')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS polls_poll_search_gin ON polls_poll USING GIN (({PG_DOCUMENT}))"
+        )
+    elif vendor == "mysql":
+        schema_editor.execute(
+            "ALTER TABLE polls_poll ADD FULLTEXT INDEX polls_poll_search_ft (title, description)"
+        )
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS polls_poll_fts "
+                "USING fts5(title, description, tokenize='porter unicode61')"
+            )
+        except OperationalError:
+            return  # SQLite built without FTS5: search falls back to icontains
+        schema_editor.execute(
+            "INSERT INTO polls_poll_fts (rowid, title, description) "
+            "SELECT id, title, description FROM polls_poll"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS polls_poll_search_gin")
+    elif vendor == "mysql":
+        schema_editor.execute("ALTER TABLE polls_poll DROP INDEX polls_poll_search_ft")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS polls_poll_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0002_alter_vote_timestamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
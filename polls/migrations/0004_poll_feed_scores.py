@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:03
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+# Frozen copy of polls.trending's weighting as of this migration, so later
+# changes to the app code can't change (or break) what this migration does.
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+TRENDING_HALF_LIFE = timedelta(hours=12)
+
+
+def vote_weight(when, count=1):
+    elapsed = (when - TRENDING_EPOCH).total_seconds()
+    return math.log(2) * elapsed / TRENDING_HALF_LIFE.total_seconds() + math.log(count)
+
+
+def backfill_feed_scores(apps, schema_editor):
+    """Seed vote_count/trending_score from existing votes (bucketed per hour)."""
+    Poll = apps.get_model("polls", "Poll")
+    Vote = apps.get_model("polls", "Vote")
+
+    weights = defaultdict(list)
+    buckets = (
+        Vote.objects.annotate(hour=TruncHour("timestamp"))
+        .values("poll_id", "hour")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for row in buckets.iterator():
+        weights[row["poll_id"]].append((vote_weight(row["hour"], row["n"]), row["n"]))
+
+    for poll_id, rows in weights.items():
+        top = max(w for w, _ in rows)
+        score = top + math.log(sum(math.exp(w - top) for w, _ in rows))
+        Poll.objects.filter(pk=poll_id).update(
+            vote_count=sum(n for _, n in rows), trending_score=score
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_poll_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.AddField(
+            model_name='poll',
+            name='vote_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_feed_scores, migrations.RunPython.noop),
+    ]
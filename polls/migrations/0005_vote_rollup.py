@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_poll_feed_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=6)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_rollups', to='polls.option')),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_rollups', to='polls.poll')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['poll', 'resolution', 'bucket_start'], name='rollup_poll_bucket_idx'), models.Index(fields=['resolution', 'bucket_start'], name='rollup_resolution_bucket_idx')],
+                'constraints': [models.UniqueConstraint(fields=('option', 'resolution', 'bucket_start'), name='unique_option_rollup_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_option_tallies(apps, schema_editor):
+    Option = apps.get_model("polls", "Option")
+    Vote = apps.get_model("polls", "Vote")
+
+    counts = (
+        Vote.objects.filter(option_id=OuterRef("pk"))
+        .values("option_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    Option.objects.update(vote_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_vote_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='option',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_option_tallies, migrations.RunPython.noop),
+    ]
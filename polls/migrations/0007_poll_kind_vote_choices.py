@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0006_option_vote_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='kind',
+            field=models.CharField(choices=[('single', 'Single choice'), ('multi', 'Multiple choice'), ('ranked', 'Ranked choice (instant runoff)')], default='single', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='vote',
+            name='choices',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
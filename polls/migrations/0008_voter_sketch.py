@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_poll_kind_vote_choices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoterSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('poll', 'Poll'), ('day', 'Day')], max_length=4)),
+                ('key', models.CharField(max_length=32)),
+                ('registers', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='unique_voter_sketch')],
+            },
+        ),
+    ]
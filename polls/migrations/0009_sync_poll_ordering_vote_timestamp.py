@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0008_voter_sketch'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='poll',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='timestamp',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+    ]
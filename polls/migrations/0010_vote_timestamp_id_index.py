@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0009_sync_poll_ordering_vote_timestamp'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['timestamp', 'id'], name='vote_timestamp_id_idx'),
+        ),
+    ]
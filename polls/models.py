@@ -1,15 +1,22 @@
 from django.conf import settings
 from django.core.cache import cache
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from datetime import timedelta
 
+from . import poll_meta, search
+
 
 def default_created_at():
     return timezone.now()
 
 
 class Poll(models.Model):
+    class Kind(models.TextChoices):
+        SINGLE = "single", "Single choice"
+        MULTI = "multi", "Multiple choice"
+        RANKED = "ranked", "Ranked choice (instant runoff)"
+
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     created_by = models.ForeignKey(
@@ -17,16 +24,34 @@ class Poll(models.Model):
     )
     created_at = models.DateTimeField(default=default_created_at)
     expires_at = models.DateTimeField(blank=True, null=True)
+    kind = models.CharField(max_length=10, choices=Kind.choices, default=Kind.SINGLE)
+
+    # Denormalized feed counters, maintained by polls.trending
+    vote_count = models.PositiveIntegerField(default=0, db_index=True)
+    trending_score = models.FloatField(default=0.0, db_index=True)
 
     class Meta:
         ordering = ["-created_at"]
 
-    def save(self, *args, **kwargs):
+    def fill_defaults(self):
+        """Default expiry (created_at + 7 days); also needed before bulk_create."""
         if not self.expires_at:
             if not self.created_at:
                 self.created_at = default_created_at()
             self.expires_at = self.created_at + timedelta(days=7)
+
+    def save(self, *args, **kwargs):
+        self.fill_defaults()
         super().save(*args, **kwargs)
+        search.index_poll(self)
+        poll_meta.invalidate(self.pk)
+
+    def delete(self, *args, **kwargs):
+        poll_id = self.pk
+        result = super().delete(*args, **kwargs)
+        search.unindex_poll(poll_id)
+        poll_meta.invalidate(poll_id)
+        return result
 
     def is_active(self):
         return timezone.now() < self.expires_at
@@ -39,11 +64,23 @@ class Option(models.Model):
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name="options")
     text = models.CharField(max_length=255)
 
+    # Denormalized tally, maintained by polls.events
+    vote_count = models.PositiveIntegerField(default=0)
+
     @property
     def votes_count(self):
         """Returns number of votes for this option."""
         return self.votes.count()
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        poll_meta.invalidate(self.poll_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        poll_meta.invalidate(self.poll_id)
+        return result
+
     def __str__(self):
         return f"{self.poll.title} — {self.text}"
 
@@ -53,17 +90,35 @@ class Vote(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="votes"
     )
     poll = models.ForeignKey("Poll", on_delete=models.CASCADE, related_name="votes")
+    # First (or only) choice; tallies and exports key off it
     option = models.ForeignKey("Option", on_delete=models.CASCADE, related_name="votes")
+    # Multi/ranked polls: every selected option id, in preference order for ranked polls
+    choices = models.JSONField(default=list, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["user", "poll"], name="unique_user_poll_vote")
         ]
+        indexes = [
+            # Keyset order of the columnar analytics export (polls.columnar)
+            models.Index(fields=["timestamp", "id"], name="vote_timestamp_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.email} -> {self.option.text}"
 
+    def counted_option_ids(self):
+        """Options this vote adds to Option.vote_count: every pick on multi polls, else the first."""
+        return self._counted_option_ids(self.option_id, self.choices)
+
+    def _counted_option_ids(self, option_id, choices):
+        if len(choices) > 1:
+            meta = poll_meta.get(self.poll_id)
+            if meta is not None and meta.kind == Poll.Kind.MULTI:
+                return list(choices)
+        return [option_id]
+
     @staticmethod
     def get_user_vote(user_id, poll_id):
         cache_key = f"user_vote:{user_id}:{poll_id}"
@@ -77,19 +132,111 @@ class Vote(models.Model):
         return vote
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        previous = None
+        # The row and its counters commit together: a failing hook rolls the vote back
+        with transaction.atomic():
+            if not adding and self.pk:
+                # e.g. an admin edit; the API changes votes through change_option()
+                previous = Vote.objects.filter(pk=self.pk).values_list("option_id", "choices").first()
+            super().save(*args, **kwargs)
+
+            if adding:
+                from .events import votes_cast
+                votes_cast([self])
+            elif previous is not None and previous != (self.option_id, self.choices):
+                from .events import vote_changed
+                vote_changed(self, previous[0], self._counted_option_ids(*previous))
 
         # update user_vote cache
         cache.set(f"user_vote:{self.user_id}:{self.poll_id}", self.id, timeout=60 * 5)
 
-        # invalidate poll results cache
-        cache.delete(f"poll_results:{self.poll_id}")
+    def change_option(self, option_id, choices=()):
+        """
+        Move this vote to another option of the same poll, or (multi/ranked)
+        to other picks `choices`, led by `option_id`: one transaction that
+        updates the row in place and adjusts the option tallies by the
+        difference. Returns False if the vote already had these picks.
+        """
+        from .events import vote_changed
+
+        choices = list(choices)
+        with transaction.atomic():
+            previous = Vote.objects.select_for_update().filter(pk=self.pk).values_list("option_id", "choices").first()
+            if previous is None:
+                raise Vote.DoesNotExist("Vote was retracted.")
+            self.option_id, self.choices = option_id, choices
+            if previous == (option_id, choices):
+                return False
+            Vote.objects.filter(pk=self.pk).update(option_id=option_id, choices=choices)
+            vote_changed(self, previous[0], self._counted_option_ids(*previous))
+        return True
 
     def delete(self, *args, **kwargs):
+        from .events import vote_removed
+
         # invalidate user_vote cache
         cache.delete(f"user_vote:{self.user_id}:{self.poll_id}")
 
-        # invalidate poll results cache
-        cache.delete(f"poll_results:{self.poll_id}")
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if result[1].get(self._meta.label):  # not already deleted by a concurrent request
+                vote_removed(self)
+        return result
+
 
-        super().delete(*args, **kwargs)
+class VoteRollup(models.Model):
+    """
+    Pre-aggregated vote counts per (option, time bucket), maintained by
+    polls.rollups. Recent buckets are per minute; `compact_vote_rollups`
+    folds older ones into hours and then days.
+    """
+
+    class Resolution(models.TextChoices):
+        MINUTE = "minute", "Minute"
+        HOUR = "hour", "Hour"
+        DAY = "day", "Day"
+
+    poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name="vote_rollups")
+    option = models.ForeignKey(Option, on_delete=models.CASCADE, related_name="vote_rollups")
+    resolution = models.CharField(max_length=6, choices=Resolution.choices)
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["option", "resolution", "bucket_start"], name="unique_option_rollup_bucket"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["poll", "resolution", "bucket_start"], name="rollup_poll_bucket_idx"),
+            models.Index(fields=["resolution", "bucket_start"], name="rollup_resolution_bucket_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.option_id} @ {self.bucket_start:%Y-%m-%d %H:%M} ({self.resolution}): {self.count}"
+
+
+class VoterSketch(models.Model):
+    """
+    HyperLogLog sketch of the distinct voters of one poll or one day,
+    maintained by polls.sketches (zlib-compressed registers, ≤ 2 KB).
+    """
+
+    class Scope(models.TextChoices):
+        POLL = "poll", "Poll"
+        DAY = "day", "Day"
+
+    scope = models.CharField(max_length=4, choices=Scope.choices)
+    key = models.CharField(max_length=32)  # poll id, or ISO date for days
+    registers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "key"], name="unique_voter_sketch")
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
@@ -18,3 +18,15 @@ class IsAdminOrReadOnly(BasePermission):
             return True
         # fallback: deny
         return False
+
+
+class IsPollAdmin(BasePermission):
+    """
+    Admin-only access, for every method (including GET).
+    Same admin definition as the rest of the API: is_staff or role == 'admin'.
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        return bool(getattr(user, "is_staff", False) or getattr(user, "role", None) == "admin")
@@ -0,0 +1,120 @@
+"""
+Per-poll metadata for the vote path: expiry, kind and the ids of the poll's options.
+
+Votes read it from a small in-process LRU backed by the shared cache, so a
+vote is validated (expiry, option exists, option belongs to *this* poll)
+without a database query. Entries are dropped when a poll is saved or
+deleted and when an option is added or removed (see models): at once, and
+again after the transaction commits, in case a concurrent reader cached
+the pre-commit rows in between. Other processes see the change once their
+local copy expires (LOCAL_TTL). With a per-process cache (LocMemCache)
+the "shared" entry is only this process's, which no other worker's
+invalidation can reach, so it is kept no longer than LOCAL_TTL either.
+
+The same writes bump the poll's *version*, a shared-cache counter that
+derived caches (e.g. result breakdowns) put in their keys, so a structural
+change orphans every entry built against the old shape of the poll. They
+also drop the poll's cached anonymous responses (polls.response_cache).
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from . import response_cache
+
+PollMeta = namedtuple("PollMeta", ["expires_at", "option_ids", "kind"])
+
+SHARED_TIMEOUT = 60 * 60  # 1 hour; invalidated explicitly on writes (shared cache only)
+LOCAL_TTL = 5  # seconds a process may serve its own copy
+LOCAL_MAX_SIZE = 4096
+
+_local = OrderedDict()  # poll_id -> (valid_until, PollMeta)
+_lock = threading.Lock()
+
+
+def cache_is_process_local():
+    return isinstance(caches["default"], LocMemCache)
+
+
+def _cache_key(poll_id):
+    return f"poll_meta:{poll_id}"
+
+
+def _version_key(poll_id):
+    return f"poll_version:{poll_id}"
+
+
+def version(poll_id):
+    """Current version of `poll_id`; starts from a timestamp so an evicted counter never repeats."""
+    key = _version_key(poll_id)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, time.time_ns(), None)
+        current = cache.get(key)
+    return current
+
+
+def _load(poll_id):
+    """One query: the poll's expiry and kind LEFT JOINed with its option ids."""
+    from .models import Poll
+
+    rows = list(Poll.objects.filter(pk=poll_id).values_list("expires_at", "kind", "options__id"))
+    if not rows:
+        return None
+    option_ids = frozenset(option_id for _, _, option_id in rows if option_id is not None)
+    return PollMeta(rows[0][0], option_ids, rows[0][1])
+
+
+def get(poll_id):
+    """Return the PollMeta for `poll_id`, or None if the poll doesn't exist."""
+    try:
+        poll_id = int(poll_id)
+    except (TypeError, ValueError):
+        return None
+
+    now = time.monotonic()
+    with _lock:
+        entry = _local.get(poll_id)
+        if entry is not None and entry[0] > now:
+            _local.move_to_end(poll_id)
+            return entry[1]
+
+    meta = cache.get(_cache_key(poll_id))
+    if meta is None:
+        meta = _load(poll_id)
+        if meta is None:
+            return None
+        cache.set(_cache_key(poll_id), meta, LOCAL_TTL if cache_is_process_local() else SHARED_TIMEOUT)
+
+    with _lock:
+        _local[poll_id] = (now + LOCAL_TTL, meta)
+        _local.move_to_end(poll_id)
+        while len(_local) > LOCAL_MAX_SIZE:
+            _local.popitem(last=False)
+    return meta
+
+
+def invalidate(poll_id):
+    """The poll or its options changed: drop its metadata now and once the write commits."""
+    _drop(poll_id)
+    transaction.on_commit(lambda: _drop(poll_id))
+
+
+def _drop(poll_id):
+    with _lock:
+        _local.pop(poll_id, None)
+    cache.delete(_cache_key(poll_id))
+    try:
+        cache.incr(_version_key(poll_id))
+    except ValueError:  # nobody has read the version yet
+        pass
+    response_cache.invalidate(poll_id)
+
+
+def clear_local():
+    with _lock:
+        _local.clear()
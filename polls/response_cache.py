@@ -0,0 +1,88 @@
+"""
+Rendered-response cache for anonymous GET /polls/ and GET /polls/{id}/.
+
+Anonymous clients all get the same bytes, so AnonymousResponseCacheMiddleware
+stores the rendered response (status, headers, body) and replays it on the
+next anonymous request without touching the ORM or DRF.
+
+Entries are keyed by scheme, host, path and query string (the paginated
+list links to absolute next/previous URLs) and a *response version*: one
+per poll for the detail page, and one for the list. Any write that changes
+what those pages show bumps the versions, orphaning the old entries:
+
+- poll and option writes, through poll_meta.invalidate()
+- vote writes (tallies), after commit, from events
+- bulk imports (new polls in the list)
+
+Entries also expire after RESPONSE_TIMEOUT, which bounds how long an
+expired poll stays in the list and, with a per-process cache, how stale
+another worker's copy can get.
+
+Only requests without credentials (no Authorization header, no session
+cookie) that accept JSON are served from or written to the cache.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+RESPONSE_TIMEOUT = 60  # seconds
+LIST_VERSION_KEY = "poll_response_version:list"
+
+# Headers that belong to one response only
+_UNCACHED_HEADERS = {"set-cookie", "server-timing", "x-profile-id", "x-cache"}
+
+
+def _version_key(poll_id):
+    return f"poll_response_version:{poll_id}"
+
+
+def _version(key):
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, time.time_ns(), None)
+        current = cache.get(key)
+    return current
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:  # nobody has cached against it yet
+        pass
+
+
+def invalidate(poll_id):
+    """The poll's detail and the poll list changed."""
+    _bump(_version_key(poll_id))
+    _bump(LIST_VERSION_KEY)
+
+
+def invalidate_list():
+    _bump(LIST_VERSION_KEY)
+
+
+def cache_key(request, poll_id=None):
+    version = _version(_version_key(poll_id) if poll_id is not None else LIST_VERSION_KEY)
+    # Pagination links are absolute URLs built from the scheme and host
+    url = f"{request.scheme}://{request.get_host()}{request.get_full_path()}"
+    return f"poll_response:{hashlib.sha1(url.encode()).hexdigest()}:{version}"
+
+
+def is_anonymous(request):
+    return "HTTP_AUTHORIZATION" not in request.META and settings.SESSION_COOKIE_NAME not in request.COOKIES
+
+
+def accepts_json(request):
+    accept = request.META.get("HTTP_ACCEPT", "")
+    return not accept or accept == "*/*" or accept.startswith("application/json")
+
+
+def get(key):
+    return cache.get(key)
+
+
+def store(key, response):
+    headers = [(name, value) for name, value in response.items() if name.lower() not in _UNCACHED_HEADERS]
+    cache.set(key, {"status": response.status_code, "headers": headers, "content": response.content}, RESPONSE_TIMEOUT)
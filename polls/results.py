@@ -0,0 +1,71 @@
+"""
+Cached payload for GET /polls/{id}/results/.
+
+Counts come from the denormalized tallies: `Option.vote_count` (votes on
+single-choice polls, selections on multi-select polls, first preferences
+on ranked polls) and `Poll.vote_count` (voters). Ranked polls also carry
+the instant-runoff rounds (polls.runoff), refreshed when the payload is
+rebuilt. Vote writes patch the cached payload in place (see events)
+instead of dropping it, so a busy poll doesn't rebuild its results after
+every vote. A payload is still rebuilt at least every RESULTS_TIMEOUT
+seconds: patches keep the original expiry rather than extending it.
+"""
+import time
+from itertools import chain
+
+from django.core.cache import cache
+
+from . import runoff
+from .models import Option, Poll
+
+RESULTS_TIMEOUT = 60  # seconds
+
+
+def cache_key(poll_id):
+    return f"poll_results:{poll_id}"
+
+
+def build(poll):
+    from .serializers import PollSerializer
+
+    data = {
+        "poll": PollSerializer(poll).data,
+        "total_votes": poll.vote_count,
+        "options": [
+            {"id": opt.id, "text": opt.text, "votes_count": opt.vote_count}
+            for opt in poll.options.all()
+        ],
+    }
+    if poll.kind == Poll.Kind.RANKED:
+        data["runoff"] = runoff.cached_tally(poll)
+    return data
+
+
+def get_cached(poll_id):
+    entry = cache.get(cache_key(poll_id))
+    return entry["data"] if entry else None
+
+
+def set_cached(poll_id, data, expires_at=None):
+    expires_at = expires_at or time.time() + RESULTS_TIMEOUT
+    timeout = expires_at - time.time()
+    if timeout > 0:
+        cache.set(cache_key(poll_id), {"data": data, "expires_at": expires_at}, timeout)
+
+
+def patch_cached(poll_id, option_ids):
+    """Refresh the counts of `option_ids` in the cached payload, if there is one."""
+    entry = cache.get(cache_key(poll_id))
+    if entry is None:
+        return
+    rows = Option.objects.filter(pk__in=option_ids).values_list("id", "vote_count", "poll__vote_count")
+    counts, total_votes = {}, None
+    for option_id, vote_count, total_votes in rows:
+        counts[option_id] = vote_count
+    data = entry["data"]
+    for option in chain(data["options"], data["poll"]["options"]):
+        if option["id"] in counts:
+            option["votes_count"] = counts[option["id"]]
+    if total_votes is not None:
+        data["total_votes"] = data["poll"]["vote_count"] = total_votes
+    set_cached(poll_id, data, entry["expires_at"])
@@ -0,0 +1,97 @@
+"""
+Retention: archive long-expired polls to gzip JSONL, then purge them in
+small batches instead of one giant cascading DELETE.
+
+For each poll (oldest first):
+
+1. Archive: the poll (with its options and tallies) and then every vote,
+   one JSON object per line, streamed from SQL a keyset page at a time into
+   `<archive dir>/poll-<id>.jsonl.gz`. The file is written under a
+   `.partial` name and renamed when complete, so an existing archive is
+   always whole.
+2. Purge: votes and rollup buckets are deleted BATCH_SIZE rows at a time,
+   each batch its own short transaction, with a pause between batches so
+   replicas and concurrent writers keep up. The poll row (and its
+   handful of options) goes last.
+
+Runs are resumable: a poll whose archive already exists is not archived
+again (some of its votes may already be gone), only purged further.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .exports import rows_by_id
+from .models import Poll, Vote, VoteRollup
+
+BATCH_SIZE = 1000
+PAUSE = 0.1  # seconds between delete batches
+EXPORT_CHUNK_SIZE = 5000
+
+POLL_FIELDS = ("id", "title", "description", "created_by_id", "created_at", "expires_at", "kind", "vote_count")
+VOTE_FIELDS = ("id", "user_id", "option_id", "choices", "timestamp")
+
+
+def archive_dir():
+    return Path(settings.POLL_ARCHIVE_DIR)
+
+
+def archive_path(directory, poll_id):
+    return Path(directory) / f"poll-{poll_id}.jsonl.gz"
+
+
+def expired_polls(days):
+    """Polls that expired more than `days` days ago, oldest id first."""
+    return Poll.objects.filter(expires_at__lt=timezone.now() - timedelta(days=days)).order_by("id")
+
+
+def _line(record):
+    return json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def write_archive(poll, path):
+    """Stream `poll` and its votes into `path`; returns the number of votes written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+
+    record = {"type": "poll", **{field: getattr(poll, field) for field in POLL_FIELDS}}
+    record["options"] = list(poll.options.order_by("id").values("id", "text", "vote_count"))
+    rows = rows_by_id(Vote.objects.filter(poll_id=poll.pk), VOTE_FIELDS, EXPORT_CHUNK_SIZE)
+    votes = 0
+    with gzip.open(partial, "wt", encoding="utf-8") as out:
+        out.write(_line(record))
+        for row in rows:
+            out.write(_line({"type": "vote", **dict(zip(VOTE_FIELDS, row))}))
+            votes += 1
+    os.replace(partial, path)
+    return votes
+
+
+def delete_in_batches(model, poll_id, batch_size=BATCH_SIZE, pause=PAUSE):
+    """Delete `model` rows of a poll, `batch_size` at a time. Returns the number deleted."""
+    deleted = 0
+    while True:
+        ids = list(model.objects.filter(poll_id=poll_id).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += model.objects.filter(pk__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+def purge_poll(poll, directory, batch_size=BATCH_SIZE, pause=PAUSE):
+    """Archive (unless already archived) and delete one poll. Returns (archived votes or None, deleted votes)."""
+    path = archive_path(directory, poll.pk)
+    archived = None if path.exists() else write_archive(poll, path)
+    deleted = delete_in_batches(Vote, poll.pk, batch_size, pause)
+    delete_in_batches(VoteRollup, poll.pk, batch_size, pause)
+    poll.delete()
+    return archived, deleted
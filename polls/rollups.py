@@ -0,0 +1,233 @@
+"""
+Per-option vote time series, stored as pre-aggregated buckets (VoteRollup).
+
+- The vote path adds to the current minute bucket; a batch of votes costs
+  one locked read of its buckets plus one bulk update and one bulk insert.
+  Changed and retracted votes are moved / taken out of the bucket that
+  holds them, so the series stay in step with the tallies. Votes count
+  under their first (or only) choice.
+- `compact_vote_rollups` folds minute buckets older than MINUTE_RETENTION
+  into hour buckets, and hour buckets older than HOUR_RETENTION into day
+  buckets, which caps storage per option at roughly
+  2 days × 1440 + 90 days × 24 + one row per older day.
+- Reads (`series`) only touch the rollup table, never `Vote`.
+- `rebuild_vote_rollups` backfills every bucket from `Vote`.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import VoteRollup
+
+Resolution = VoteRollup.Resolution
+
+# Coarsest last; index = granularity rank
+RESOLUTIONS = [Resolution.MINUTE, Resolution.HOUR, Resolution.DAY]
+
+MINUTE_RETENTION = timedelta(days=getattr(settings, "POLLS_ROLLUP_MINUTE_RETENTION_DAYS", 2))
+HOUR_RETENTION = timedelta(days=getattr(settings, "POLLS_ROLLUP_HOUR_RETENTION_DAYS", 90))
+REBUILD_BATCH_SIZE = 5000
+
+
+def truncate(when, resolution):
+    when = when.replace(second=0, microsecond=0)
+    if resolution in (Resolution.HOUR, Resolution.DAY):
+        when = when.replace(minute=0)
+    if resolution == Resolution.DAY:
+        when = when.replace(hour=0)
+    return when
+
+
+def _locked_buckets(option_ids, resolutions, starts):
+    """Existing buckets for any combination of the given keys, locked, keyed by (option, resolution, start)."""
+    rows = VoteRollup.objects.select_for_update().filter(
+        option_id__in=option_ids, resolution__in=resolutions, bucket_start__in=starts
+    )
+    return {(row.option_id, row.resolution, row.bucket_start): row for row in rows}
+
+
+def _upsert(counts):
+    """counts: {(poll_id, option_id, resolution, bucket_start): n}. One read, one bulk write each way."""
+    with transaction.atomic():
+        existing = _locked_buckets(
+            {key[1] for key in counts}, {key[2] for key in counts}, {key[3] for key in counts}
+        )
+        created, changed = [], []
+        for (poll_id, option_id, resolution, bucket_start), count in counts.items():
+            row = existing.get((option_id, resolution, bucket_start))
+            if row is None:
+                created.append(VoteRollup(
+                    poll_id=poll_id, option_id=option_id, resolution=resolution,
+                    bucket_start=bucket_start, count=count,
+                ))
+            else:
+                row.count += count
+                changed.append(row)
+        VoteRollup.objects.bulk_update(changed, ["count"])
+        VoteRollup.objects.bulk_create(created)
+
+
+def _add_many(counts):
+    counts = {key: n for key, n in counts.items() if n > 0}
+    if not counts:
+        return
+    try:
+        _upsert(counts)
+    except IntegrityError:
+        _upsert(counts)  # another writer created one of the buckets first; now it exists
+
+
+def _subtract(counts):
+    """
+    counts: {(option_id, minute bucket start): n}. Takes the votes out of
+    the finest bucket that still holds them (compaction may have folded
+    the minute bucket into its hour or day).
+    """
+    counts = {key: n for key, n in counts.items() if n > 0}
+    if not counts:
+        return
+    candidates = {
+        key: [(resolution, truncate(key[1], resolution)) for resolution in RESOLUTIONS] for key in counts
+    }
+    with transaction.atomic():
+        existing = _locked_buckets(
+            {option_id for option_id, _ in counts},
+            RESOLUTIONS,
+            {start for options in candidates.values() for _, start in options},
+        )
+        changed = {}
+        for (option_id, minute), count in counts.items():
+            for resolution, start in candidates[(option_id, minute)]:
+                row = existing.get((option_id, resolution, start))
+                if row is not None:
+                    row.count = max(0, row.count - count)
+                    changed[row.pk] = row
+                    break
+        VoteRollup.objects.bulk_update(list(changed.values()), ["count"])
+
+
+def record(votes):
+    """Add freshly cast votes to their minute buckets."""
+    _add_many(Counter(
+        (vote.poll_id, vote.option_id, Resolution.MINUTE, truncate(vote.timestamp, Resolution.MINUTE))
+        for vote in votes
+    ))
+
+
+def remove(votes):
+    """Take retracted votes out of the buckets they were counted in."""
+    _subtract(Counter((vote.option_id, truncate(vote.timestamp, Resolution.MINUTE)) for vote in votes))
+
+
+def move(vote, previous_option_id):
+    """A vote changed option: move it between the options' buckets, at its original time."""
+    minute = truncate(vote.timestamp, Resolution.MINUTE)
+    _subtract({(previous_option_id, minute): 1})
+    _add_many({(vote.poll_id, vote.option_id, Resolution.MINUTE, minute): 1})
+
+
+def _fold(source, target, cutoff):
+    """Merge `source` buckets older than `cutoff` into `target` buckets."""
+    old = VoteRollup.objects.filter(resolution=source, bucket_start__lt=cutoff)
+    with transaction.atomic():
+        merged = (
+            old.annotate(target_start=Trunc("bucket_start", target, tzinfo=dt_timezone.utc))
+            .values("poll_id", "option_id", "target_start")
+            .annotate(total=Sum("count"))
+            .order_by()
+        )
+        counts = {
+            (row["poll_id"], row["option_id"], target, row["target_start"]): row["total"] for row in merged
+        }
+        _add_many(counts)
+        old.delete()
+    return len(counts)
+
+
+def rebuild(now=None):
+    """
+    Recompute every bucket from the Vote table (backfill, or repair after a
+    bulk load that skipped the vote hooks): votes within MINUTE_RETENTION
+    go to minute buckets, within HOUR_RETENTION to hours, older ones to days,
+    exactly as if they had been recorded live and compacted since.
+    Returns the number of buckets written.
+    """
+    from .models import Vote
+
+    now = now or timezone.now()
+    minute_cutoff = truncate(now - MINUTE_RETENTION, Resolution.HOUR)
+    hour_cutoff = truncate(now - HOUR_RETENTION, Resolution.DAY)
+    ranges = [
+        (Resolution.MINUTE, {"timestamp__gte": minute_cutoff}),
+        (Resolution.HOUR, {"timestamp__gte": hour_cutoff, "timestamp__lt": minute_cutoff}),
+        (Resolution.DAY, {"timestamp__lt": hour_cutoff}),
+    ]
+    written = 0
+    with transaction.atomic():
+        VoteRollup.objects.all().delete()
+        for resolution, window in ranges:
+            rows = (
+                Vote.objects.filter(**window)
+                .annotate(start=Trunc("timestamp", resolution, tzinfo=dt_timezone.utc))
+                .values("poll_id", "option_id", "start")
+                .annotate(n=Count("id"))
+                .order_by()
+            )
+            batch = []
+            for row in rows.iterator():
+                batch.append(VoteRollup(
+                    poll_id=row["poll_id"], option_id=row["option_id"], resolution=resolution,
+                    bucket_start=row["start"], count=row["n"],
+                ))
+                if len(batch) >= REBUILD_BATCH_SIZE:
+                    VoteRollup.objects.bulk_create(batch)
+                    written, batch = written + len(batch), []
+            VoteRollup.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def compact(now=None):
+    """Downsample old buckets. Returns {target resolution: buckets written}."""
+    now = now or timezone.now()
+    return {
+        Resolution.HOUR: _fold(Resolution.MINUTE, Resolution.HOUR, truncate(now - MINUTE_RETENTION, Resolution.HOUR)),
+        Resolution.DAY: _fold(Resolution.HOUR, Resolution.DAY, truncate(now - HOUR_RETENTION, Resolution.DAY)),
+    }
+
+
+def series(poll_id, interval):
+    """
+    Vote counts per option for a poll, bucketed by `interval`.
+    Buckets that were already compacted to something coarser than `interval`
+    are returned at their own resolution.
+    """
+    rank = RESOLUTIONS.index(interval)
+    rows = (
+        VoteRollup.objects.filter(poll_id=poll_id)
+        .annotate(start=Trunc("bucket_start", interval))
+        .values("resolution", "start", "option_id")
+        .annotate(total=Sum("count"))
+        .order_by()
+    )
+
+    buckets = defaultdict(Counter)
+    for row in rows:
+        resolution = RESOLUTIONS[max(rank, RESOLUTIONS.index(row["resolution"]))]
+        start = truncate(row["start"], resolution)
+        buckets[(start, resolution)][row["option_id"]] += row["total"]
+
+    return [
+        {
+            "start": start,
+            "resolution": resolution,
+            "total": sum(counts.values()),
+            "counts": dict(counts),
+        }
+        for (start, resolution), counts in sorted(buckets.items())
+    ]
@@ -0,0 +1,186 @@
+"""
+Instant-runoff tallying for ranked-choice polls.
+
+Ballots are loaded once into a compact int32 matrix (one row per ballot,
+option *indices* in preference order, padded with a sentinel), allocated
+up front and filled a page of votes at a time. Each
+elimination round is then a few vectorized NumPy operations: every ballot
+keeps a pointer to its highest-ranked continuing option, and only ballots
+whose option was just eliminated get their pointer advanced.
+
+Without NumPy the same algorithm runs in pure Python, which is fine for
+small polls but far slower on large ones (see benchmarks/bench_irv.py).
+
+Each round eliminates every option tied for the fewest votes; if all the
+continuing options are tied, the runoff ends without a winner.
+Round-by-round results are cached for RUNOFF_TIMEOUT seconds.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .exports import pages_by_id
+from .models import Vote
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised via the pure-Python path
+    np = None
+
+RUNOFF_TIMEOUT = 60  # seconds
+LOAD_CHUNK_SIZE = 10000
+
+
+def cache_key(poll_id):
+    return f"poll_runoff:{poll_id}"
+
+
+# -----------------------------
+# Engines: ballots are rows of option indices, best first
+# -----------------------------
+def _finish_round(rounds, counts, exhausted, alive):
+    """Record a round; return (done, winner_index, losers)."""
+    continuing = [i for i, is_alive in enumerate(alive) if is_alive]
+    rounds.append({"counts": {i: int(counts[i]) for i in continuing}, "exhausted": int(exhausted)})
+    total = sum(int(counts[i]) for i in continuing)
+    if not continuing or total == 0:
+        return True, None, []
+    leader = max(continuing, key=lambda i: counts[i])
+    if counts[leader] * 2 > total or len(continuing) == 1:
+        return True, leader, []
+    fewest = min(counts[i] for i in continuing)
+    losers = [i for i in continuing if counts[i] == fewest]
+    if len(losers) == len(continuing):
+        return True, None, []  # everyone tied
+    rounds[-1]["eliminated"] = losers
+    return False, None, losers
+
+
+def instant_runoff_numpy(matrix, num_options):
+    """`matrix`: (ballots, width) int array, padded with -1."""
+    num_ballots, width = matrix.shape
+    sentinel = num_options
+    # Extra sentinel column so a pointer can always rest on "exhausted"
+    ranked = np.full((num_ballots, width + 1), sentinel, dtype=np.int32)
+    ranked[:, :width] = np.where(matrix < 0, sentinel, matrix)
+
+    alive = np.ones(num_options + 1, dtype=bool)
+    alive[sentinel] = False
+    pos = np.zeros(num_ballots, dtype=np.intp)
+    top = ranked[:, 0].copy()
+    rounds = []
+
+    while True:
+        stale = np.flatnonzero(~alive[top] & (pos < width))
+        while stale.size:
+            pos[stale] += 1
+            top[stale] = ranked[stale, pos[stale]]
+            stale = stale[~alive[top[stale]] & (pos[stale] < width)]
+
+        counts = np.bincount(top, minlength=num_options + 1)
+        done, winner, losers = _finish_round(rounds, counts, counts[sentinel], alive[:num_options])
+        if done:
+            return rounds, winner
+        alive[losers] = False
+
+
+def instant_runoff_python(ballots, num_options):
+    """`ballots`: list of lists of option indices."""
+    alive = [True] * num_options
+    pos = [0] * len(ballots)
+    rounds = []
+
+    while True:
+        counts = [0] * num_options
+        exhausted = 0
+        for b, ballot in enumerate(ballots):
+            p = pos[b]
+            while p < len(ballot) and not alive[ballot[p]]:
+                p += 1
+            pos[b] = p
+            if p < len(ballot):
+                counts[ballot[p]] += 1
+            else:
+                exhausted += 1
+
+        done, winner, losers = _finish_round(rounds, counts, exhausted, alive)
+        if done:
+            return rounds, winner
+        for i in losers:
+            alive[i] = False
+
+
+# -----------------------------
+# Loading + public API
+# -----------------------------
+def _fill(matrix, start, ballots):
+    """Scatter `ballots` (lists of option indices) into matrix rows start, start + 1, ..."""
+    lengths = np.fromiter((len(b) for b in ballots), dtype=np.intp, count=len(ballots))
+    flat = np.fromiter((i for b in ballots for i in b), dtype=np.int32, count=int(lengths.sum()))
+    row_ids = start + np.repeat(np.arange(len(ballots)), lengths)
+    col_ids = np.arange(flat.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    matrix[row_ids, col_ids] = flat
+
+
+def load_ballots(poll_id, option_ids):
+    """
+    Ballots of a poll as option indices (positions in `option_ids`).
+    A NumPy matrix padded with -1 when NumPy is available, else a list of lists.
+    Choices that no longer exist (deleted options) are dropped.
+
+    With NumPy the matrix is allocated up front (a ballot ranks each option
+    at most once, so it is at most len(option_ids) wide) and filled a
+    keyset page of LOAD_CHUNK_SIZE votes at a time: only one page of
+    ballots ever exists as Python lists.
+    """
+    index = {option_id: i for i, option_id in enumerate(option_ids)}
+    votes = Vote.objects.filter(poll_id=poll_id)
+    stats = votes.aggregate(count=Count("id"), last_id=Max("id"))
+    votes = votes.filter(id__lte=stats["last_id"] or 0)  # votes cast meanwhile wait for the next tally
+    pages = pages_by_id(votes, ("id", "choices", "option_id"), LOAD_CHUNK_SIZE)
+
+    def ballot(choices, option_id):
+        return [index[c] for c in (choices or [option_id]) if c in index]
+
+    if np is None:
+        return [ballot(choices, option_id) for page in pages for _, choices, option_id in page]
+
+    matrix = np.full((stats["count"], max(len(option_ids), 1)), -1, dtype=np.int32)
+    filled = 0
+    for page in pages:
+        page = [ballot(choices, option_id) for _, choices, option_id in page][: len(matrix) - filled]
+        _fill(matrix, filled, page)
+        filled += len(page)
+    return matrix[:filled]  # fewer rows if votes were retracted meanwhile
+
+
+def tally(poll):
+    """Run the instant runoff for `poll` and return a JSON-ready summary."""
+    option_ids = sorted(poll.options.values_list("id", flat=True))
+    ballots = load_ballots(poll.pk, option_ids)
+    if np is not None:
+        rounds, winner = instant_runoff_numpy(ballots, len(option_ids))
+    else:
+        rounds, winner = instant_runoff_python(ballots, len(option_ids))
+
+    return {
+        "ballots": len(ballots),
+        "winner": option_ids[winner] if winner is not None else None,
+        "rounds": [
+            {
+                "round": number,
+                "counts": {str(option_ids[i]): n for i, n in r["counts"].items()},
+                "exhausted": r["exhausted"],
+                "eliminated": [option_ids[i] for i in r.get("eliminated", [])],
+            }
+            for number, r in enumerate(rounds, start=1)
+        ],
+    }
+
+
+def cached_tally(poll):
+    key = cache_key(poll.pk)
+    data = cache.get(key)
+    if data is None:
+        data = tally(poll)
+        cache.set(key, data, RUNOFF_TIMEOUT)
+    return data
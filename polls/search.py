@@ -0,0 +1,129 @@
+"""
+Full-text search over poll titles and descriptions.
+
+Each backend keeps its own index (created in migration 0003):
+- PostgreSQL: GIN index on a weighted `tsvector` expression (maintained by Postgres).
+- MySQL:      FULLTEXT index on (title, description) (maintained by MySQL).
+- SQLite:     FTS5 shadow table `polls_poll_fts`, kept in sync from `Poll.save()`
+              (bulk paths call `index_polls`).
+
+Matching, the caller's filters (active polls only) and ranking happen in
+one query, ordered on the rank itself, so pagination's LIMIT applies to
+active matches only and expired polls can't crowd them out.
+"""
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SQLITE_FTS_TABLE = "polls_poll_fts"
+
+# Must stay identical to the indexed expression in migration 0003,
+# otherwise Postgres won't use the GIN index.
+PG_DOCUMENT = (
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', description), 'B')"
+)
+
+
+def _fts5_query(q):
+    """Quote each term so user input can't inject FTS5 query syntax."""
+    terms = ['"%s"' % term.replace('"', '""') for term in q.split()]
+    return " ".join(terms)
+
+
+def _sqlite_has_index(cursor):
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_FTS_TABLE]
+    )
+    return cursor.fetchone() is not None
+
+
+def _has_index():
+    vendor = connection.vendor
+    if vendor in ("postgresql", "mysql"):
+        return True
+    if vendor == "sqlite":
+        with connection.cursor() as cursor:
+            return _sqlite_has_index(cursor)
+    return False
+
+
+def _match_and_rank(q):
+    """
+    (match condition, rank expression, rank ordering) for the current
+    backend's full-text index. Both reference the poll row itself, so the
+    match, the caller's filters (e.g. expiry) and the ranking all run in
+    one query, before pagination's LIMIT.
+    """
+    vendor = connection.vendor
+    if vendor == "postgresql":
+        match = RawSQL(f"({PG_DOCUMENT}) @@ websearch_to_tsquery('english', %s)", [q], output_field=BooleanField())
+        rank = RawSQL(f"ts_rank({PG_DOCUMENT}, websearch_to_tsquery('english', %s))", [q], output_field=FloatField())
+        return match, rank, "-search_rank"
+    if vendor == "mysql":
+        against = "MATCH(title, description) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        return (
+            RawSQL(against, [q], output_field=BooleanField()),
+            RawSQL(against, [q], output_field=FloatField()),
+            "-search_rank",
+        )
+    # SQLite FTS5: bm25 is lower-is-better
+    fts_query = _fts5_query(q)
+    match = RawSQL(
+        f'"polls_poll"."id" IN (SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s)',
+        [fts_query],
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"(SELECT bm25({SQLITE_FTS_TABLE}, 2.0, 1.0) FROM {SQLITE_FTS_TABLE} "
+        f'WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = "polls_poll"."id")',
+        [fts_query],
+        output_field=FloatField(),
+    )
+    return match, rank, "search_rank"
+
+
+def search_polls(queryset, q):
+    """Filter `queryset` down to polls matching `q`, ordered by relevance."""
+    q = q.strip()
+    if not q:
+        return queryset
+
+    if not _has_index():
+        # No full-text index on this backend: correct, but a table scan.
+        return queryset.filter(Q(title__icontains=q) | Q(description__icontains=q))
+
+    match, rank, ordering = _match_and_rank(q)
+    return queryset.filter(match).annotate(search_rank=rank).order_by(ordering, "-id")
+
+
+# -----------------------------
+# SQLite index maintenance
+# -----------------------------
+def index_poll(poll):
+    """(Re)index a poll. No-op on backends whose index is maintained by the database."""
+    index_polls([poll])
+
+
+def index_polls(polls):
+    """Bulk variant of index_poll, for code paths that bypass Poll.save()."""
+    if connection.vendor != "sqlite" or not polls:
+        return
+    with connection.cursor() as cursor:
+        if not _sqlite_has_index(cursor):
+            return
+        cursor.executemany(
+            f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = %s", [(poll.pk,) for poll in polls]
+        )
+        cursor.executemany(
+            f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)",
+            [(poll.pk, poll.title, poll.description) for poll in polls],
+        )
+
+
+def unindex_poll(poll_id):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        if _sqlite_has_index(cursor):
+            cursor.execute(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = %s", [poll_id])
@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db import IntegrityError
+from django.db import IntegrityError, connection, transaction
 
 from .models import Poll, Option, Vote
+from . import events, poll_meta
 
 User = get_user_model()
 
@@ -12,8 +13,8 @@ User = get_user_model()
 # Option Serializers
 # -----------------------------
 class OptionSerializer(serializers.ModelSerializer):
-    """Read-only option serializer with vote count."""
-    votes_count = serializers.IntegerField(read_only=True)
+    """Read-only option serializer with vote count (from the denormalized tally)."""
+    votes_count = serializers.IntegerField(source="vote_count", read_only=True)
 
     class Meta:
         model = Option
@@ -58,8 +59,11 @@ class PollSerializer(serializers.ModelSerializer):
             "created_by",
             "created_at",
             "expires_at",
+            "kind",
+            "vote_count",
             "options",
         ]
+        read_only_fields = ["vote_count"]
 
 
 class CreatePollSerializer(serializers.ModelSerializer):
@@ -74,7 +78,7 @@ class CreatePollSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Poll
-        fields = ["title", "description", "expires_at", "options"]
+        fields = ["title", "description", "expires_at", "kind", "options"]
 
     def validate_options(self, value):
         # Normalize to [{"text": "..."}]
@@ -95,6 +99,7 @@ class CreatePollSerializer(serializers.ModelSerializer):
         request = self.context["request"]
         poll = Poll.objects.create(created_by=request.user, **validated_data)
         Option.objects.bulk_create([Option(poll=poll, text=o["text"]) for o in options_data])
+        poll_meta.invalidate(poll.pk)  # bulk_create skips Option.save()
         return poll
 
 
@@ -103,45 +108,187 @@ class CreatePollSerializer(serializers.ModelSerializer):
 # -----------------------------
 class VoteSerializer(serializers.ModelSerializer):
     """
-    Accepts {"option_id": <id>} to cast a vote.
-    Validates option existence & poll expiry.
+    Casts (POST) or changes (PUT) a vote in the poll given as context["poll_id"]:
+        single-choice:  {"option_id": <id>}
+        multi/ranked:   {"option_ids": [<id>, ...]}  (ranked: best first)
+    Validates poll expiry and that the options belong to that poll from the
+    cached poll metadata (no queries); the vote itself is a single INSERT.
     Handles race conditions via IntegrityError.
-    Returns option details + timestamp for clients.
     """
-    option_id = serializers.IntegerField(write_only=True)
+    option_id = serializers.IntegerField(write_only=True, required=False)
+    option_ids = serializers.ListField(
+        child=serializers.IntegerField(), write_only=True, required=False, allow_empty=False
+    )
     option = OptionSerializer(read_only=True)
     timestamp = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Vote
-        fields = ["option_id", "option", "timestamp"]
+        fields = ["option_id", "option_ids", "option", "timestamp"]
 
     def validate(self, attrs):
-        option_id = attrs.get("option_id")
-
-        try:
-            option = Option.objects.select_related("poll").get(pk=option_id)
-        except Option.DoesNotExist:
-            raise serializers.ValidationError({"option_id": "Option not found."})
-
-        poll = option.poll
+        poll_id = self.context["poll_id"]
+        meta = poll_meta.get(poll_id)
+        if meta is None:
+            raise serializers.ValidationError({"poll": "Poll not found."})
 
         # Expiration check
-        if poll.expires_at and timezone.now() >= poll.expires_at:
+        if meta.expires_at and timezone.now() >= meta.expires_at:
             raise serializers.ValidationError({"poll": "Poll has expired."})
 
-        attrs["option"] = option
-        attrs["poll"] = poll
+        if meta.kind == Poll.Kind.SINGLE:
+            if "option_id" not in attrs:
+                raise serializers.ValidationError({"option_id": "This field is required."})
+            if attrs["option_id"] not in meta.option_ids:
+                raise serializers.ValidationError({"option_id": "Option not found in this poll."})
+            attrs["choices"] = []
+        else:
+            choices = attrs.get("option_ids") or ([attrs["option_id"]] if "option_id" in attrs else None)
+            if not choices:
+                raise serializers.ValidationError({"option_ids": "Select at least one option."})
+            if len(set(choices)) != len(choices):
+                raise serializers.ValidationError({"option_ids": "Options must not repeat."})
+            if not meta.option_ids.issuperset(choices):
+                raise serializers.ValidationError({"option_ids": "Option not found in this poll."})
+            attrs["option_id"] = choices[0]
+            attrs["choices"] = choices
+
+        attrs["poll_id"] = int(poll_id)
         return attrs
 
     def create(self, validated_data):
         user = self.context["request"].user
-        option = validated_data.pop("option")
-        poll = validated_data.pop("poll")
-
         try:
-            vote = Vote.objects.create(user=user, poll=poll, option=option)
+            vote = Vote.objects.create(
+                user=user,
+                poll_id=validated_data["poll_id"],
+                option_id=validated_data["option_id"],
+                choices=validated_data["choices"],
+            )
         except IntegrityError:
             raise serializers.ValidationError({"poll": "User has already voted in this poll."})
 
         return vote
+
+    def update(self, instance, validated_data):
+        try:
+            instance.change_option(validated_data["option_id"], validated_data["choices"])
+        except Vote.DoesNotExist:
+            raise serializers.ValidationError({"poll": "Vote was retracted."})
+        return instance
+
+
+# -----------------------------
+# Batch Ballot Serializers
+# -----------------------------
+class BallotItemSerializer(serializers.Serializer):
+    """{"poll_id", "option_id"}, or {"poll_id", "option_ids"} for multi/ranked polls."""
+    poll_id = serializers.IntegerField()
+    option_id = serializers.IntegerField(required=False)
+    option_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+
+    def validate(self, attrs):
+        if "option_ids" in attrs:
+            if len(set(attrs["option_ids"])) != len(attrs["option_ids"]):
+                raise serializers.ValidationError({"option_ids": "Options must not repeat."})
+            attrs["option_id"] = attrs["option_ids"][0]
+        elif "option_id" not in attrs:
+            raise serializers.ValidationError({"option_id": "This field is required."})
+        return attrs
+
+
+class BallotSerializer(serializers.Serializer):
+    """
+    Accepts {"votes": [{"poll_id": 1, "option_id": 3}, ...]} and casts all
+    valid votes at once; multi/ranked polls take "option_ids" (ranked: best
+    first), single-choice polls exactly one option:
+    - one query validates every option, its poll and expiry,
+    - one query finds polls the user already voted in,
+    - one bulk_create inserts the rest, in the same transaction as the
+      tally updates.
+    `save()` returns a per-item status list in request order.
+    """
+    MAX_ITEMS = 100
+
+    votes = BallotItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
+
+    def validate_votes(self, value):
+        option_ids = {option_id for item in value for option_id in item.get("option_ids", [item["option_id"]])}
+        self.context["options"] = {
+            option_id: (poll_id, expires_at, kind)
+            for option_id, poll_id, expires_at, kind in Option.objects.filter(pk__in=option_ids)
+            .values_list("id", "poll_id", "poll__expires_at", "poll__kind")
+        }
+        return value
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        items = validated_data["votes"]
+        options = self.context["options"]
+        now = timezone.now()
+
+        already_voted = set(
+            Vote.objects.filter(user=user, poll_id__in={item["poll_id"] for item in items})
+            .values_list("poll_id", flat=True)
+        )
+
+        results, pending, seen_polls = [], [], set()
+        for item in items:
+            result = {key: item[key] for key in ("poll_id", "option_id", "option_ids") if key in item}
+            results.append(result)
+
+            picks = item.get("option_ids", [item["option_id"]])
+            poll_id, expires_at, kind = options.get(item["option_id"], (None, None, None))
+            if any(option_id not in options for option_id in picks):
+                result["status"] = "option_not_found"
+            elif any(options[option_id][0] != item["poll_id"] for option_id in picks):
+                result["status"] = "option_not_in_poll"
+            elif kind == Poll.Kind.SINGLE and len(picks) > 1:
+                result["status"] = "single_choice_poll"
+            elif expires_at and now >= expires_at:
+                result["status"] = "poll_expired"
+            elif poll_id in already_voted:
+                result["status"] = "already_voted"
+            elif poll_id in seen_polls:
+                result["status"] = "duplicate_poll"
+            else:
+                seen_polls.add(poll_id)
+                choices = [] if kind == Poll.Kind.SINGLE else picks
+                vote = Vote(user=user, poll_id=poll_id, option_id=item["option_id"], choices=choices)
+                pending.append((result, vote))
+
+        with transaction.atomic():  # the votes and their tally updates commit together
+            created = self._insert(pending)
+            if created:
+                events.votes_cast(created)
+        return results
+
+    def _insert(self, pending):
+        """bulk_create everything; on a race with another request, fall back row by row."""
+        votes = [vote for _, vote in pending]
+        try:
+            with transaction.atomic():
+                Vote.objects.bulk_create(votes)
+            for result, _ in pending:
+                result["status"] = "created"
+            created = votes
+        except IntegrityError:
+            created = []
+            for result, vote in pending:
+                try:
+                    with transaction.atomic():
+                        Vote.objects.bulk_create([vote])  # plain INSERT; hooks run once, by the caller
+                    result["status"] = "created"
+                    created.append(vote)
+                except IntegrityError:
+                    result["status"] = "already_voted"
+
+        if created and not connection.features.can_return_rows_from_bulk_insert:
+            # e.g. MySQL: bulk_create can't hand back the new ids; (user, poll) is unique
+            ids = dict(
+                Vote.objects.filter(user_id=created[0].user_id, poll_id__in=[vote.poll_id for vote in created])
+                .values_list("poll_id", "id")
+            )
+            for vote in created:
+                vote.pk = ids[vote.poll_id]
+        return created
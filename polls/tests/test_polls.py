@@ -1,11 +1,24 @@
+import gzip
+import io
+import json
+
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
-from polls.models import Poll, Option, Vote
+from polls.models import Poll, Option, Vote, VoteRollup, VoterSketch
+from polls import columnar, events, exports, hll, idempotency, importer, poll_meta, retention, rollups, runoff, search, sketches, trending
+from polls.importer import iter_records
+from api.throttling import VoteThrottle
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Sum
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
 
 User = get_user_model()
 
@@ -13,6 +26,15 @@ User = get_user_model()
 # -----------------------------
 # Fixtures
 # -----------------------------
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    poll_meta.clear_local()
+    yield
+    cache.clear()
+    poll_meta.clear_local()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -122,6 +144,440 @@ def test_prevent_duplicate_vote(api_client, voter_user, active_poll):
     assert "already voted" in str(response.data).lower()
 
 
+@pytest.mark.django_db
+def test_vote_with_option_from_another_poll_rejected(api_client, voter_user, admin_user, active_poll):
+    other = Poll.objects.create(title="Other", created_by=admin_user, expires_at=active_poll.expires_at)
+    foreign_option = Option.objects.create(poll=other, text="Elsewhere")
+
+    api_client.force_authenticate(user=voter_user)
+    url = reverse("poll-vote", kwargs={"pk": active_poll.id})
+    response = api_client.post(url, {"option_id": foreign_option.id}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "option_id" in response.data
+    assert not Vote.objects.filter(user=voter_user).exists()
+
+
+@pytest.mark.django_db
+def test_vote_validated_from_cached_poll_meta(api_client, voter_user, active_poll):
+    option = active_poll.options.first()
+    poll_meta.get(active_poll.id)  # warm, as any earlier vote on the poll would
+    api_client.force_authenticate(user=voter_user)
+    url = reverse("poll-vote", kwargs={"pk": active_poll.id})
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.post(url, {"option_id": option.id}, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+
+    sql = [q["sql"] for q in ctx.captured_queries]
+    assert not [q for q in sql if q.startswith("SELECT") and ('"polls_option"' in q or '"polls_poll"' in q)]
+    assert len([q for q in sql if q.startswith('INSERT INTO "polls_vote" ')]) == 1
+
+
+@pytest.mark.django_db
+def test_change_and_retract_vote_patch_cached_results(
+    api_client, voter_user, active_poll, django_capture_on_commit_callbacks
+):
+    first, second = active_poll.options.order_by("id")
+    api_client.force_authenticate(user=voter_user)
+    vote_url = reverse("poll-vote", kwargs={"pk": active_poll.id})
+    results_url = reverse("poll-results", kwargs={"pk": active_poll.id})
+
+    assert api_client.post(vote_url, {"option_id": first.id}, format="json").status_code == status.HTTP_201_CREATED
+    assert api_client.get(results_url).data["total_votes"] == 1  # now cached
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.put(vote_url, {"option_id": second.id}, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    vote = Vote.objects.get(user=voter_user, poll=active_poll)
+    assert vote.option_id == second.id
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.vote_count, second.vote_count) == (0, 1)
+
+    cached = cache.get(f"poll_results:{active_poll.id}")
+    assert cached is not None  # patched, not dropped
+    counts = {o["id"]: o["votes_count"] for o in cached["data"]["options"]}
+    assert counts == {first.id: 0, second.id: 1}
+    assert cached["data"]["total_votes"] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert api_client.delete(vote_url).status_code == status.HTTP_204_NO_CONTENT
+    assert not Vote.objects.filter(user=voter_user, poll=active_poll).exists()
+    data = api_client.get(results_url).data
+    assert data["total_votes"] == 0
+    assert all(o["votes_count"] == 0 for o in data["poll"]["options"])
+
+    assert api_client.delete(vote_url).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_change_vote_rejects_option_from_another_poll(api_client, voter_user, admin_user, active_poll):
+    option = active_poll.options.first()
+    Vote.objects.create(user=voter_user, poll=active_poll, option=option)
+    other = Poll.objects.create(title="Other", created_by=admin_user, expires_at=active_poll.expires_at)
+    foreign_option = Option.objects.create(poll=other, text="Elsewhere")
+
+    api_client.force_authenticate(user=voter_user)
+    url = reverse("poll-vote", kwargs={"pk": active_poll.id})
+    response = api_client.put(url, {"option_id": foreign_option.id}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Vote.objects.get(user=voter_user, poll=active_poll).option_id == option.id
+
+
+# Ballots over options A=0, B=1, C=2: C is eliminated, its ballot transfers to B, B wins 3-2
+IRV_BALLOTS = [[0, 1], [0], [1, 0], [1], [2, 1]]
+
+
+def test_instant_runoff_engines_agree():
+    np = pytest.importorskip("numpy")
+    matrix = np.full((len(IRV_BALLOTS), 2), -1, dtype=np.int32)
+    for row, ballot in enumerate(IRV_BALLOTS):
+        matrix[row, :len(ballot)] = ballot
+
+    expected = [
+        {"counts": {0: 2, 1: 2, 2: 1}, "exhausted": 0, "eliminated": [2]},
+        {"counts": {0: 2, 1: 3}, "exhausted": 0},
+    ]
+    assert runoff.instant_runoff_python(IRV_BALLOTS, 3) == (expected, 1)
+    assert runoff.instant_runoff_numpy(matrix, 3) == (expected, 1)
+
+
+def test_instant_runoff_full_tie_has_no_winner():
+    rounds, winner = runoff.instant_runoff_python([[0], [1]], 2)
+    assert winner is None and len(rounds) == 1
+
+
+@pytest.mark.django_db
+def test_ranked_poll_votes_and_runoff_results(api_client, admin_user, active_poll, monkeypatch):
+    poll = Poll.objects.create(
+        title="Ranked", created_by=admin_user, kind=Poll.Kind.RANKED, expires_at=active_poll.expires_at
+    )
+    a, b, c = Option.objects.bulk_create([Option(poll=poll, text=t) for t in "ABC"])
+    ids = [a.id, b.id, c.id]
+    url = reverse("poll-vote", kwargs={"pk": poll.id})
+    for n, ballot in enumerate(IRV_BALLOTS):
+        voter = User.objects.create(email=f"ranked-{n}@example.com")
+        api_client.force_authenticate(user=voter)
+        response = api_client.post(url, {"option_ids": [ids[i] for i in ballot]}, format="json")
+        assert response.status_code == status.HTTP_201_CREATED
+
+    response = api_client.post(url, {"option_ids": [a.id, a.id]}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST  # repeats (and already voted)
+
+    data = api_client.get(reverse("poll-results", kwargs={"pk": poll.id})).data
+    assert data["total_votes"] == 5
+    assert {o["id"]: o["votes_count"] for o in data["options"]} == {a.id: 2, b.id: 2, c.id: 1}
+    assert data["runoff"]["winner"] == b.id
+    assert [r["eliminated"] for r in data["runoff"]["rounds"]] == [[c.id], []]
+
+    # one keyset page of two votes per query, into a matrix as wide as the option list
+    monkeypatch.setattr(runoff, "LOAD_CHUNK_SIZE", 2)
+    with CaptureQueriesContext(connection) as queries:
+        matrix = runoff.load_ballots(poll.id, ids)
+    assert len(queries) == 1 + 3  # count/max, then pages of 2, 2 and 1
+    assert matrix.tolist() == [b + [-1] * (3 - len(b)) for b in IRV_BALLOTS]
+
+    monkeypatch.setattr(runoff, "np", None)  # pure-Python fallback gives the same result
+    assert runoff.load_ballots(poll.id, ids) == IRV_BALLOTS
+    assert runoff.tally(poll) == data["runoff"]
+
+
+@pytest.mark.django_db
+def test_multi_select_vote_counts_every_pick(api_client, voter_user, admin_user, active_poll):
+    poll = Poll.objects.create(
+        title="Multi", created_by=admin_user, kind=Poll.Kind.MULTI, expires_at=active_poll.expires_at
+    )
+    a, b, c = Option.objects.bulk_create([Option(poll=poll, text=t) for t in "ABC"])
+    api_client.force_authenticate(user=voter_user)
+    url = reverse("poll-vote", kwargs={"pk": poll.id})
+    assert api_client.post(url, {"option_ids": [a.id, c.id]}, format="json").status_code == status.HTTP_201_CREATED
+
+    counts = dict(Option.objects.filter(poll=poll).values_list("id", "vote_count"))
+    assert counts == {a.id: 1, b.id: 0, c.id: 1}
+
+    # changing the picks moves the tallies by the difference
+    assert api_client.put(url, {"option_ids": [b.id]}, format="json").status_code == status.HTTP_200_OK
+    assert dict(Option.objects.filter(poll=poll).values_list("id", "vote_count")) == {a.id: 0, b.id: 1, c.id: 0}
+    assert api_client.put(url, {"option_ids": [c.id, b.id]}, format="json").status_code == status.HTTP_200_OK
+    assert dict(Option.objects.filter(poll=poll).values_list("id", "vote_count")) == {a.id: 0, b.id: 1, c.id: 1}
+    assert Vote.objects.get(user=voter_user, poll=poll).choices == [c.id, b.id]
+    poll.refresh_from_db()
+    assert poll.vote_count == 1
+
+    assert api_client.delete(url).status_code == status.HTTP_204_NO_CONTENT
+    assert set(Option.objects.filter(poll=poll).values_list("vote_count", flat=True)) == {0}
+
+
+@pytest.mark.django_db
+def test_results_breakdown_by_role_is_cached_and_patched(
+    api_client, admin_user, voter_user, active_poll, django_capture_on_commit_callbacks
+):
+    first, second = active_poll.options.order_by("id")
+    Vote.objects.create(user=voter_user, poll=active_poll, option=first)
+    Vote.objects.create(user=admin_user, poll=active_poll, option=second)
+    url = reverse("poll-results", kwargs={"pk": active_poll.id})
+
+    api_client.force_authenticate(user=voter_user)
+    assert api_client.get(url, {"by": "role"}).status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=admin_user)
+    assert api_client.get(url, {"by": "shoe_size"}).status_code == status.HTTP_400_BAD_REQUEST
+    data = api_client.get(url, {"by": "role"}).data
+    assert data["segments"] == [
+        {"segment": "admin", "total": 1, "options": {str(second.id): 1}},
+        {"segment": "voter", "total": 1, "options": {str(first.id): 1}},
+    ]
+
+    late_voter = User.objects.create(email="late@example.com")
+    with django_capture_on_commit_callbacks(execute=True):
+        Vote.objects.create(user=late_voter, poll=active_poll, option=second)
+    with CaptureQueriesContext(connection) as ctx:
+        data = api_client.get(url, {"by": "role"}).data
+    assert not [q for q in ctx.captured_queries if "GROUP BY" in q["sql"]]  # patched, not recomputed
+    assert data["segments"][1] == {"segment": "voter", "total": 2, "options": {str(first.id): 1, str(second.id): 1}}
+
+    today = timezone.now().date().isoformat()
+    assert api_client.get(url, {"by": "day"}).data["segments"] == [
+        {"segment": today, "total": 3, "options": {str(first.id): 1, str(second.id): 2}}
+    ]
+    cohort = api_client.get(url, {"by": "cohort"}).data["segments"]
+    assert [segment["total"] for segment in cohort] == [3]
+
+    version = poll_meta.version(active_poll.id)
+    Option.objects.create(poll=active_poll, text="New option")
+    assert poll_meta.version(active_poll.id) != version  # old cross-tabs are orphaned
+
+
+def test_hyperloglog_estimate_within_error_bound():
+    sketches = [hll.HyperLogLog() for _ in range(4)]
+    for n in range(20000):
+        sketches[n % 4].add(n)
+        sketches[(n + 1) % 4].add(n)  # every value lands in two sketches
+    merged = hll.union(sketches)
+    assert abs(merged.count() - 20000) <= 20000 * 3 * hll.RELATIVE_ERROR
+    assert hll.HyperLogLog.from_bytes(merged.to_bytes()).count() == merged.count()
+    assert hll.HyperLogLog().count() == 0
+
+
+@pytest.mark.django_db
+def test_unique_voters_endpoint(
+    api_client, admin_user, voter_user, active_poll, django_capture_on_commit_callbacks
+):
+    other = Poll.objects.create(title="Other", created_by=admin_user, expires_at=active_poll.expires_at)
+    other_option = Option.objects.create(poll=other, text="Only")
+    with django_capture_on_commit_callbacks(execute=True):
+        Vote.objects.create(user=voter_user, poll=active_poll, option=active_poll.options.first())
+        Vote.objects.create(user=voter_user, poll=other, option=other_option)
+        Vote.objects.create(user=admin_user, poll=other, option=other_option)
+    assert VoterSketch.objects.count() == 3  # two polls, one day
+
+    url = reverse("poll-unique-voters")
+    api_client.force_authenticate(user=voter_user)
+    assert api_client.get(url, {"polls": active_poll.id}).status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=admin_user)
+    assert api_client.get(url, {"polls": active_poll.id}).data["estimate"] == 1
+    assert api_client.get(url, {"polls": f"{active_poll.id},{other.id}"}).data["estimate"] == 2
+
+    today = timezone.now().date()
+    week_ago = (today - timedelta(days=6)).isoformat()
+    data = api_client.get(url, {"from": week_ago, "to": today.isoformat(), "group": "day"}).data
+    assert data["estimate"] == 2
+    assert len(data["series"]) == 7 and data["series"][-1] == {"period": today.isoformat(), "estimate": 2}
+
+    assert api_client.get(url).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(url, {"from": today.isoformat(), "to": week_ago}).status_code == status.HTTP_400_BAD_REQUEST
+
+    VoterSketch.objects.all().delete()
+    call_command("rebuild_voter_sketches", stdout=io.StringIO())
+    assert api_client.get(url, {"polls": other.id}).data["estimate"] == 2
+
+    # a voter the sketches already hold: one unlocked read, no locked write
+    votes = list(Vote.objects.filter(poll=other))
+    with CaptureQueriesContext(connection) as ctx:
+        sketches.record(votes)
+    assert len(ctx.captured_queries) == 1 and ctx.captured_queries[0]["sql"].startswith("SELECT")
+
+
+@pytest.mark.django_db
+def test_anonymous_poll_responses_cached_until_a_write(
+    api_client, voter_user, admin_user, active_poll, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    detail_url = reverse("poll-detail", kwargs={"pk": active_poll.id})
+    list_url = reverse("poll-list")
+    first = api_client.get(detail_url)
+    assert first["X-Cache"] == "MISS"
+    assert api_client.get(list_url)["X-Cache"] == "MISS"
+
+    with django_assert_num_queries(0):
+        hit = api_client.get(detail_url)
+        assert api_client.get(list_url)["X-Cache"] == "HIT"
+    assert hit["X-Cache"] == "HIT"
+    assert hit.content == first.content and hit["Content-Type"] == first["Content-Type"]
+
+    # pagination links are absolute, so each host and scheme gets its own entry
+    assert api_client.get(list_url, HTTP_HOST="localhost")["X-Cache"] == "MISS"
+    assert api_client.get(list_url, HTTP_HOST="localhost", secure=True)["X-Cache"] == "MISS"
+
+    # a vote drops the poll's detail and the list
+    voter = APIClient()
+    voter.force_authenticate(user=voter_user)
+    with django_capture_on_commit_callbacks(execute=True):
+        voter.post(
+            reverse("poll-vote", kwargs={"pk": active_poll.id}),
+            {"option_id": active_poll.options.first().id},
+            format="json",
+        )
+    response = api_client.get(detail_url)
+    assert response["X-Cache"] == "MISS" and json.loads(response.content)["vote_count"] == 1
+    assert api_client.get(list_url)["X-Cache"] == "MISS"
+
+    # so does an option write
+    Option.objects.create(poll=active_poll, text="Option 3")
+    response = api_client.get(detail_url)
+    assert response["X-Cache"] == "MISS" and len(json.loads(response.content)["options"]) == 3
+
+    # credentialed requests bypass the cache
+    response = api_client.get(detail_url, HTTP_AUTHORIZATION="Bearer whatever")
+    assert "X-Cache" not in response
+
+
+@pytest.mark.django_db
+def test_archive_polls_writes_jsonl_and_purges_in_batches(
+    admin_user, voter_user, active_poll, expired_poll, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(retention, "EXPORT_CHUNK_SIZE", 1)  # votes are read a keyset page at a time
+    option = expired_poll.options.order_by("id").first()
+    Vote.objects.bulk_create([Vote(user=u, poll=expired_poll, option=option) for u in (admin_user, voter_user)])
+    # an interrupted earlier run already wrote half an archive
+    (tmp_path / f"poll-{expired_poll.id}.jsonl.gz.partial").write_bytes(b"junk")
+
+    out = io.StringIO()
+    call_command("archive_polls", days=0, archive_dir=str(tmp_path), batch_size=1, sleep=0, stdout=out)
+    assert "archived 2 votes, deleted 2 votes" in out.getvalue()
+
+    assert not Poll.objects.filter(pk=expired_poll.id).exists()
+    assert not Vote.objects.filter(poll_id=expired_poll.id).exists()
+    assert Poll.objects.filter(pk=active_poll.id).exists()  # not expired
+
+    with gzip.open(tmp_path / f"poll-{expired_poll.id}.jsonl.gz", "rt") as archive:
+        records = [json.loads(line) for line in archive]
+    assert records[0]["type"] == "poll" and records[0]["title"] == "Expired Poll"
+    assert [o["text"] for o in records[0]["options"]] == ["Option 1", "Option 2"]
+    assert {r["user_id"] for r in records[1:]} == {admin_user.id, voter_user.id}
+    assert all(r["type"] == "vote" and r["option_id"] == option.id for r in records[1:])
+
+
+@pytest.mark.django_db
+def test_columnar_export_is_incremental_and_partitioned_by_day(admin_user, voter_user, active_poll, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    first, second = active_poll.options.order_by("id")
+    old = Vote.objects.create(user=admin_user, poll=active_poll, option=first)
+    Vote.objects.filter(pk=old.pk).update(timestamp=timezone.now() - timedelta(days=2))
+    recent = Vote.objects.create(user=voter_user, poll=active_poll, option=second)
+    Vote.objects.filter(pk=recent.pk).update(timestamp=timezone.now() - timedelta(hours=1))
+
+    call_command("export_votes_columnar", output_dir=str(tmp_path), batch_size=1, stdout=io.StringIO())
+    files = sorted(tmp_path.glob("votes/date=*/*.parquet"))
+    assert len(files) == 2  # one per day
+    table = pq.read_table(files[0])
+    assert table.column("id").to_pylist() == [old.id]
+    assert table.column("option_id").to_pylist() == [first.id]
+    assert not list(tmp_path.glob("**/*.partial"))
+
+    # the next run only picks up votes past the watermark
+    other = User.objects.create_user(email="late@example.com", password="StrongPass123")
+    late = Vote.objects.create(user=other, poll=active_poll, option=first)
+    Vote.objects.filter(pk=late.pk).update(timestamp=timezone.now() - timedelta(minutes=30))
+    out = io.StringIO()
+    call_command("export_votes_columnar", output_dir=str(tmp_path), stdout=out)
+    assert "Exported 1 votes into 1 files" in out.getvalue()
+    exported = [pq.read_table(f).column("id").to_pylist() for f in sorted(tmp_path.glob("votes/date=*/*.parquet"))]
+    assert sorted(sum(exported, [])) == sorted([old.id, recent.id, late.id])
+
+
+@pytest.mark.django_db
+def test_columnar_export_batches_read_the_timestamp_index_in_order():
+    if connection.vendor != "sqlite":
+        pytest.skip("checks SQLite's query plan")
+    now = timezone.now()
+    for watermark in (None, (now - timedelta(days=1), 1)):
+        plan = columnar.pending_votes(watermark, now)[:10].explain()
+        assert "vote_timestamp_id_idx" in plan and "TEMP B-TREE" not in plan
+
+
+@pytest.mark.django_db
+def test_recount_tallies_repairs_deletes_that_skip_vote_delete(admin_user, voter_user, active_poll):
+    multi = Poll.objects.create(
+        title="Multi", created_by=admin_user, kind=Poll.Kind.MULTI, expires_at=active_poll.expires_at
+    )
+    a, b = Option.objects.create(poll=multi, text="A"), Option.objects.create(poll=multi, text="B")
+    first = active_poll.options.order_by("id").first()
+    for user in (admin_user, voter_user):
+        Vote.objects.create(user=user, poll=active_poll, option=first)
+    Vote.objects.create(user=voter_user, poll=multi, option=a, choices=[a.id, b.id])
+    Vote.objects.create(user=admin_user, poll=multi, option=b, choices=[b.id])
+
+    User.objects.filter(pk=voter_user.pk).delete()  # cascades to the votes, skipping Vote.delete()
+    first.refresh_from_db()
+    assert first.vote_count == 2
+
+    out = io.StringIO()
+    call_command("recount_tallies", stdout=out)
+    assert "corrected 2 polls" in out.getvalue()
+    first.refresh_from_db()
+    active_poll.refresh_from_db()
+    assert (first.vote_count, active_poll.vote_count) == (1, 1)
+    assert dict(multi.options.values_list("id", "vote_count")) == {a.id: 0, b.id: 1}
+    assert Poll.objects.get(pk=multi.pk).vote_count == 1
+    assert events.recount_tallies() == set()
+
+
+@pytest.mark.django_db
+def test_deleting_a_user_in_the_admin_recounts_their_polls(client, admin_user, voter_user, active_poll):
+    first = active_poll.options.order_by("id").first()
+    Vote.objects.create(user=voter_user, poll=active_poll, option=first)
+
+    client.force_login(admin_user)
+    response = client.post(reverse("admin:api_user_delete", args=[voter_user.pk]), {"post": "yes"})
+    assert response.status_code == 302
+    first.refresh_from_db()
+    active_poll.refresh_from_db()
+    assert (first.vote_count, active_poll.vote_count) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_poll_meta_invalidated_on_option_add_and_poll_update(active_poll):
+    meta = poll_meta.get(active_poll.id)
+    assert len(meta.option_ids) == 2
+
+    option = Option.objects.create(poll=active_poll, text="Late addition")
+    assert option.id in poll_meta.get(active_poll.id).option_ids
+
+    active_poll.expires_at = timezone.now() - timedelta(minutes=1)
+    active_poll.save()
+    assert poll_meta.get(active_poll.id).expires_at == active_poll.expires_at
+
+
+@pytest.mark.django_db
+def test_poll_meta_dropped_again_after_commit(active_poll, django_capture_on_commit_callbacks):
+    stale = poll_meta.get(active_poll.id)
+    with django_capture_on_commit_callbacks(execute=True):
+        option = Option.objects.create(poll=active_poll, text="Late addition")
+        # a concurrent reader caches the pre-commit rows before the write commits
+        cache.set(f"poll_meta:{active_poll.id}", stale)
+    poll_meta.clear_local()
+    assert option.id in poll_meta.get(active_poll.id).option_ids
+
+
+def test_poll_meta_kept_briefly_in_a_process_local_cache(monkeypatch):
+    monkeypatch.setattr(poll_meta, "_load", lambda poll_id: poll_meta.PollMeta(None, frozenset({1}), "single"))
+    timeouts = []
+    monkeypatch.setattr(poll_meta.cache, "set", lambda key, value, timeout: timeouts.append(timeout))
+    poll_meta.get(1)
+    assert poll_meta.cache_is_process_local() and timeouts == [poll_meta.LOCAL_TTL]
+
+
 # -----------------------------
 # Expired Poll Tests
 # -----------------------------
@@ -171,3 +627,537 @@ def test_poll_results_accuracy(api_client, voter_user, active_poll):
     data = response.json()
     assert data["total_votes"] == 2
     assert sum(opt["votes_count"] for opt in data["options"]) == 2
+
+
+# -----------------------------
+# Search Tests
+# -----------------------------
+@pytest.mark.django_db
+def test_search_polls_ranked_and_synced_on_save(api_client, admin_user, active_poll):
+    later = timezone.now() + timedelta(days=1)
+    in_title = Poll.objects.create(title="Favourite jollof rice", created_by=admin_user, expires_at=later)
+    in_description = Poll.objects.create(
+        title="Lunch", description="Rice or beans?", created_by=admin_user, expires_at=later
+    )
+
+    url = reverse("poll-list")
+    response = api_client.get(url, {"q": "rice"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [p["id"] for p in response.data["results"]] == [in_title.id, in_description.id]
+
+    # Index follows edits
+    active_poll.title = "Rice festival"
+    active_poll.save()
+    ids = [p["id"] for p in api_client.get(url, {"q": "rice"}).data["results"]]
+    assert active_poll.id in ids
+
+    assert api_client.get(url, {"q": "pizza"}).data["results"] == []
+
+
+@pytest.mark.django_db
+def test_search_excludes_expired_polls(api_client, expired_poll):
+    response = api_client.get(reverse("poll-list"), {"q": "expired"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["results"] == []
+
+
+@pytest.mark.django_db
+def test_search_ranks_only_active_polls_in_one_query(api_client, admin_user):
+    past, later = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+    Poll.objects.bulk_create([
+        Poll(title=f"Rice poll {n}", created_by=admin_user, expires_at=past) for n in range(30)
+    ])
+    search.index_polls(list(Poll.objects.all()))
+    active = Poll.objects.create(title="Rice and stew", created_by=admin_user, expires_at=later)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse("poll-list"), {"q": "rice"})
+    assert [p["id"] for p in response.data["results"]] == [active.id]
+    # matched, filtered by expiry and ordered by rank in the same statement
+    ranked = [q["sql"] for q in ctx.captured_queries if "ORDER BY" in q["sql"] and "polls_poll_fts" in q["sql"]]
+    assert len(ranked) == 1 and '"expires_at" >' in ranked[0] and "CASE" not in ranked[0]
+
+
+@pytest.mark.django_db
+def test_search_query_syntax_is_escaped(api_client, active_poll):
+    response = api_client.get(reverse("poll-list"), {"q": 'active" OR NEAR('})
+    assert response.status_code == status.HTTP_200_OK
+
+
+# -----------------------------
+# Feed Tests
+# -----------------------------
+@pytest.mark.django_db
+def test_vote_updates_feed_counters(voter_user, admin_user, active_poll):
+    # an older, bigger burst of votes on another poll
+    earlier = Poll.objects.create(title="Earlier", created_by=admin_user, expires_at=active_poll.expires_at)
+    trending.record_votes(earlier.id, 3, timezone.now() - timedelta(days=2))
+
+    option = active_poll.options.first()
+    vote = Vote.objects.create(user=voter_user, poll=active_poll, option=option)
+
+    active_poll.refresh_from_db()
+    earlier.refresh_from_db()
+    assert active_poll.vote_count == 1
+    # one vote now outranks three votes two days (four half-lives) ago
+    assert active_poll.trending_score > earlier.trending_score
+    assert earlier.vote_count > active_poll.vote_count
+
+    vote.delete()
+    active_poll.refresh_from_db()
+    assert active_poll.vote_count == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_vote_rolled_back_when_a_counter_hook_fails(api_client, voter_user, active_poll, monkeypatch):
+    def broken(votes):
+        raise RuntimeError("rollup store unavailable")
+
+    monkeypatch.setattr(rollups, "record", broken)
+    api_client.force_authenticate(user=voter_user)
+    url = reverse("poll-vote", kwargs={"pk": active_poll.id})
+    option = active_poll.options.first()
+    with pytest.raises(RuntimeError):
+        api_client.post(url, {"option_id": option.id}, format="json")
+    assert not Vote.objects.filter(user=voter_user).exists()
+
+    # nothing half-counted is left behind, and the retry goes through
+    monkeypatch.undo()
+    assert api_client.post(url, {"option_id": option.id}, format="json").status_code == status.HTTP_201_CREATED
+    active_poll.refresh_from_db()
+    assert active_poll.vote_count == 1
+
+
+def test_trending_prefers_recent_votes_over_older_ones():
+    now = timezone.now()
+    old_burst = trending.vote_weight(now - timedelta(days=3), count=5)
+    fresh = trending.vote_weight(now, count=2)
+    assert fresh > old_burst
+
+
+@pytest.mark.django_db
+def test_trending_and_popular_feeds(api_client, admin_user, voter_user, active_poll, expired_poll):
+    quiet = Poll.objects.create(
+        title="Quiet Poll", created_by=admin_user, expires_at=timezone.now() + timedelta(days=1)
+    )
+    Option.objects.create(poll=quiet, text="Only option")
+    for user in (voter_user, admin_user):
+        Vote.objects.create(user=user, poll=active_poll, option=active_poll.options.first())
+    Vote.objects.create(user=voter_user, poll=expired_poll, option=expired_poll.options.first())
+
+    response = api_client.get(reverse("poll-popular"), {"limit": 5})
+    assert response.status_code == status.HTTP_200_OK
+    assert [p["id"] for p in response.data] == [active_poll.id, quiet.id]
+    assert response.data[0]["vote_count"] == 2
+
+    # polls nobody voted on aren't trending
+    response = api_client.get(reverse("poll-trending"), {"limit": 5})
+    assert response.status_code == status.HTTP_200_OK
+    assert [p["id"] for p in response.data] == [active_poll.id]
+
+
+# -----------------------------
+# Time-series Tests
+# -----------------------------
+@pytest.mark.django_db
+def test_timeseries_served_from_rollups(api_client, admin_user, voter_user, active_poll):
+    opts = list(active_poll.options.all())
+    Vote.objects.create(user=voter_user, poll=active_poll, option=opts[0])
+    Vote.objects.create(user=admin_user, poll=active_poll, option=opts[1])
+    assert VoteRollup.objects.filter(poll=active_poll, resolution="minute").count() == 2
+
+    url = reverse("poll-timeseries", kwargs={"pk": active_poll.id})
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.get(url, {"interval": "hour"})
+    assert response.status_code == status.HTTP_200_OK
+    [bucket] = response.data["buckets"]
+    assert bucket["resolution"] == "hour"
+    assert bucket["total"] == 2
+    assert bucket["counts"] == {opts[0].id: 1, opts[1].id: 1}
+
+    assert api_client.get(url, {"interval": "week"}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_timeseries_is_admin_only(api_client, voter_user, active_poll):
+    api_client.force_authenticate(user=voter_user)
+    url = reverse("poll-timeseries", kwargs={"pk": active_poll.id})
+    assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_rollup_compaction_downsamples_old_buckets(active_poll):
+    option = active_poll.options.first()
+    old = rollups.truncate(timezone.now() - timedelta(days=5), "hour")
+    for minute in (1, 2, 30):
+        VoteRollup.objects.create(
+            poll=active_poll, option=option, resolution="minute",
+            bucket_start=old.replace(minute=minute), count=2,
+        )
+
+    rollups.compact()
+
+    [hour] = VoteRollup.objects.filter(poll=active_poll)
+    assert (hour.resolution, hour.bucket_start, hour.count) == ("hour", old, 6)
+    assert rollups.series(active_poll.id, "minute")[0]["resolution"] == "hour"
+
+
+@pytest.mark.django_db
+def test_rollups_follow_vote_changes_and_rebuild_from_votes(voter_user, admin_user, active_poll):
+    first, second = active_poll.options.order_by("id")
+    vote = Vote.objects.create(user=voter_user, poll=active_poll, option=first)
+    Vote.objects.create(user=admin_user, poll=active_poll, option=first)
+
+    def counts():
+        return {
+            option_id: total
+            for option_id, total in VoteRollup.objects.filter(poll=active_poll)
+            .values_list("option_id").annotate(total=Sum("count"))
+        }
+
+    assert counts() == {first.id: 2}
+    vote.change_option(second.id)
+    assert counts() == {first.id: 1, second.id: 1}
+
+    # a retraction is taken out of whatever bucket holds the vote by now
+    rollups.compact(now=timezone.now() + timedelta(days=3))
+    assert not VoteRollup.objects.filter(poll=active_poll, resolution="minute").exists()
+    vote.delete()
+    assert counts() == {first.id: 1, second.id: 0}
+
+    # backfill from the Vote table
+    VoteRollup.objects.all().delete()
+    out = io.StringIO()
+    call_command("rebuild_vote_rollups", stdout=out)
+    assert "Rebuilt 1 vote rollup buckets" in out.getvalue()
+    assert counts() == {first.id: 1}
+
+
+# -----------------------------
+# Export Tests
+# -----------------------------
+@pytest.mark.django_db
+def test_admin_can_stream_vote_export(api_client, admin_user, voter_user, active_poll):
+    option = active_poll.options.first()
+    Vote.objects.create(user=voter_user, poll=active_poll, option=option)
+
+    api_client.force_authenticate(user=admin_user)
+    url = reverse("poll-export", kwargs={"pk": active_poll.id})
+
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0] == "voter_email,option,timestamp"
+    assert lines[1].startswith("voter@example.com,Option 1,")
+
+    response = api_client.get(url, {"gzip": "1"})
+    assert response["Content-Disposition"].endswith('.csv.gz"')
+    assert gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()[1:] == lines[1:]
+
+
+@pytest.mark.django_db
+def test_vote_export_pages_by_id_and_escapes_formulas(admin_user, voter_user, active_poll):
+    evil = Option.objects.create(poll=active_poll, text='=HYPERLINK("http://x")')
+    Vote.objects.create(user=voter_user, poll=active_poll, option=evil)
+    Vote.objects.create(user=admin_user, poll=active_poll, option=active_poll.options.first())
+
+    with CaptureQueriesContext(connection) as ctx:
+        rows = list(exports.vote_rows(active_poll.id, chunk_size=1))
+    assert [email for email, _, _ in rows] == ["voter@example.com", "admin@example.com"]
+    assert len(ctx.captured_queries) == 3  # two full pages, then an empty one
+
+    body = "".join(exports.csv_blocks(rows))
+    assert "'=HYPERLINK" in body
+    assert exports.safe_cell("-1") == "'-1" and exports.safe_cell("Rice") == "Rice"
+
+
+@pytest.mark.django_db
+def test_vote_export_is_admin_only(api_client, voter_user, active_poll):
+    api_client.force_authenticate(user=voter_user)
+    response = api_client.get(reverse("poll-export", kwargs={"pk": active_poll.id}))
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+# -----------------------------
+# Admin Tests
+# -----------------------------
+def _changelist_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("model", ["poll", "option", "vote"])
+def test_admin_changelist_query_count_is_constant(client, admin_user, model):
+    client.force_login(admin_user)
+    url = reverse(f"admin:polls_{model}_changelist")
+
+    def add_polls(count):
+        for i in range(count):
+            voter = User.objects.create(email=f"{model}-{User.objects.count()}@example.com")
+            poll = Poll.objects.create(title=f"Poll {i}", created_by=voter)
+            option = Option.objects.create(poll=poll, text=f"Option {i}")
+            Vote.objects.create(user=voter, poll=poll, option=option)
+
+    add_polls(3)
+    small = [_changelist_queries(client, url), _changelist_queries(client, url + "?q=1")]
+    add_polls(30)
+    assert [_changelist_queries(client, url), _changelist_queries(client, url + "?q=1")] == small
+
+
+# -----------------------------
+# Throttling Tests
+# -----------------------------
+@pytest.mark.django_db
+def test_vote_is_throttled_per_user(api_client, voter_user, active_poll, monkeypatch):
+    monkeypatch.setattr(VoteThrottle, "THROTTLE_RATES", {"vote": "1/min"})
+    option = active_poll.options.first()
+    api_client.force_authenticate(user=voter_user)
+    url = reverse("poll-vote", kwargs={"pk": active_poll.id})
+
+    assert api_client.post(url, {"option_id": option.id}, format="json").status_code == status.HTTP_201_CREATED
+    response = api_client.post(url, {"option_id": option.id}, format="json")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert "Retry-After" in response
+
+
+# -----------------------------
+# Idempotency Tests
+# -----------------------------
+@pytest.mark.django_db
+def test_vote_retry_with_idempotency_key_is_replayed(api_client, voter_user, active_poll):
+    option = active_poll.options.first()
+    api_client.force_authenticate(user=voter_user)
+    url = reverse("poll-vote", kwargs={"pk": active_poll.id})
+    headers = {"HTTP_IDEMPOTENCY_KEY": "retry-123"}
+
+    first = api_client.post(url, {"option_id": option.id}, format="json", **headers)
+    assert first.status_code == status.HTTP_201_CREATED
+
+    with CaptureQueriesContext(connection) as ctx:
+        replay = api_client.post(url, {"option_id": option.id}, format="json", **headers)
+    assert replay.status_code == status.HTTP_201_CREATED
+    assert replay.data == first.data
+    assert replay["Idempotent-Replayed"] == "true"
+    assert not [q for q in ctx.captured_queries if "polls_" in q["sql"]]
+    assert Vote.objects.filter(user=voter_user, poll=active_poll).count() == 1
+
+    # Same key, different body
+    other = active_poll.options.last()
+    response = api_client.post(url, {"option_id": other.id}, format="json", **headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    # Without a key, the duplicate is still rejected as before
+    response = api_client.post(url, {"option_id": option.id}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_concurrent_duplicate_with_idempotency_key_gets_conflict(api_client, voter_user, active_poll, monkeypatch):
+    monkeypatch.setattr(idempotency, "WAIT_TIMEOUT", 0.1)
+    api_client.force_authenticate(user=voter_user)
+    cache_key = idempotency._cache_key(voter_user.pk, f"vote:{active_poll.id}", "in-flight")
+    cache.add(f"{cache_key}:lock", 1, 10)  # another worker is handling it
+
+    url = reverse("poll-vote", kwargs={"pk": active_poll.id})
+    option = active_poll.options.first()
+    response = api_client.post(url, {"option_id": option.id}, format="json", HTTP_IDEMPOTENCY_KEY="in-flight")
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert not Vote.objects.filter(user=voter_user).exists()
+
+
+# -----------------------------
+# Batch Ballot Tests
+# -----------------------------
+@pytest.mark.django_db
+def test_ballot_casts_votes_in_many_polls(api_client, admin_user, voter_user, active_poll, expired_poll):
+    second = Poll.objects.create(title="Second", created_by=admin_user, expires_at=timezone.now() + timedelta(days=1))
+    second_option = Option.objects.create(poll=second, text="Yes")
+    voted_poll = Poll.objects.create(title="Voted", created_by=admin_user, expires_at=timezone.now() + timedelta(days=1))
+    voted_option = Option.objects.create(poll=voted_poll, text="Yes")
+    Vote.objects.create(user=voter_user, poll=voted_poll, option=voted_option)
+
+    first_option = active_poll.options.first()
+    payload = {"votes": [
+        {"poll_id": active_poll.id, "option_id": first_option.id},
+        {"poll_id": second.id, "option_id": second_option.id},
+        {"poll_id": active_poll.id, "option_id": active_poll.options.last().id},
+        {"poll_id": expired_poll.id, "option_id": expired_poll.options.first().id},
+        {"poll_id": voted_poll.id, "option_id": voted_option.id},
+        {"poll_id": second.id, "option_id": first_option.id},
+        {"poll_id": second.id, "option_id": 999999},
+    ]}
+
+    api_client.force_authenticate(user=voter_user)
+    response = api_client.post(reverse("poll-ballot"), payload, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["created"] == 2
+    assert [r["status"] for r in response.data["results"]] == [
+        "created", "created", "duplicate_poll", "poll_expired",
+        "already_voted", "option_not_in_poll", "option_not_found",
+    ]
+    assert Vote.objects.filter(user=voter_user).count() == 3
+
+    # Derived counters follow the bulk insert
+    second.refresh_from_db()
+    assert second.vote_count == 1
+    assert VoteRollup.objects.filter(poll=second).count() == 1
+
+
+@pytest.mark.django_db
+def test_ballot_records_every_pick_on_multi_polls(api_client, admin_user, voter_user, active_poll):
+    multi = Poll.objects.create(
+        title="Multi", created_by=admin_user, kind=Poll.Kind.MULTI, expires_at=active_poll.expires_at
+    )
+    a, b = Option.objects.create(poll=multi, text="A"), Option.objects.create(poll=multi, text="B")
+    first, second = active_poll.options.order_by("id")
+    payload = {"votes": [
+        {"poll_id": active_poll.id, "option_ids": [first.id, second.id]},
+        {"poll_id": multi.id, "option_ids": [b.id, a.id]},
+    ]}
+
+    api_client.force_authenticate(user=voter_user)
+    response = api_client.post(reverse("poll-ballot"), payload, format="json")
+    assert [r["status"] for r in response.data["results"]] == ["single_choice_poll", "created"]
+    assert Vote.objects.get(user=voter_user, poll=multi).choices == [b.id, a.id]
+    assert dict(multi.options.values_list("id", "vote_count")) == {a.id: 1, b.id: 1}
+
+
+@pytest.mark.django_db
+def test_ballot_hooks_get_vote_ids_without_bulk_returning(
+    api_client, voter_user, active_poll, monkeypatch, django_capture_on_commit_callbacks
+):
+    # MySQL's bulk_create doesn't set primary keys
+    monkeypatch.setattr(type(connection.features), "can_return_rows_from_bulk_insert", False)
+    seen = []
+    monkeypatch.setattr("polls.events.sketches.record", lambda votes: seen.extend(vote.pk for vote in votes))
+
+    api_client.force_authenticate(user=voter_user)
+    option = active_poll.options.first()
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(
+            reverse("poll-ballot"), {"votes": [{"poll_id": active_poll.id, "option_id": option.id}]}, format="json"
+        )
+    assert response.data["created"] == 1
+    option.refresh_from_db()
+    assert option.vote_count == 1
+    assert seen == [Vote.objects.get(user=voter_user).pk]
+
+
+@pytest.mark.django_db
+def test_ballot_validates_shape(api_client, voter_user):
+    api_client.force_authenticate(user=voter_user)
+    url = reverse("poll-ballot")
+    assert api_client.post(url, {"votes": []}, format="json").status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.post(url, {"votes": [{"poll_id": 1}]}, format="json").status_code == status.HTTP_400_BAD_REQUEST
+
+
+# -----------------------------
+# Bulk Import Tests
+# -----------------------------
+def test_importer_streams_json_array_across_chunk_boundaries():
+    text = json.dumps([{"title": f"Poll {i}", "options": ["A", "B"]} for i in range(50)], indent=2)
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert [r["title"] for r in iter_records(chunks)] == [f"Poll {i}" for i in range(50)]
+
+    lines = "\n".join(json.dumps({"title": f"Line {i}", "options": ["A"]}) for i in range(5))
+    assert len(list(iter_records([lines[:10], lines[10:]]))) == 5
+
+
+def test_importer_fails_fast_on_malformed_json(monkeypatch):
+    monkeypatch.setattr(importer, "MAX_RECORD_SIZE", 100)
+    read = []
+
+    def chunks(first):
+        yield first
+        for i in range(1000):
+            read.append(i)
+            yield " " * 10
+
+    with pytest.raises(importer.ImportFormatError):
+        list(iter_records(chunks('[{"title": "A", "options": ["A"]}, {"title": oops')))
+    assert len(read) <= 11
+
+    read.clear()
+    with pytest.raises(importer.ImportFormatError):
+        list(iter_records(chunks('{"title": "A", "options": ["A"]}\n{"title": oops')))
+    assert len(read) <= 11
+
+
+@pytest.mark.django_db
+def test_admin_bulk_import_upload_reports_invalid_records(api_client, admin_user):
+    records = [
+        {"title": "Imported 1", "options": ["Yes", "No"]},
+        {"title": "", "options": ["Yes"]},
+        {"title": "Imported 2", "description": "searchable bank", "options": [{"text": "A"}, "B"]},
+        ["not", "an", "object"],
+    ]
+    body = "\n".join(json.dumps(r) for r in records).encode()
+
+    api_client.force_authenticate(user=admin_user)
+    url = reverse("poll-bulk-import")
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.post(
+            url, {"file": SimpleUploadedFile("bank.jsonl", body)}, format="multipart"
+        )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["created"] == 2
+    assert [e["record"] for e in response.data["errors"]] == [1, 3]
+    assert len([q for q in ctx.captured_queries if q["sql"].startswith("INSERT INTO \"polls_")]) == 2
+
+    imported = Poll.objects.get(title="Imported 2")
+    assert imported.expires_at is not None
+    assert sorted(imported.options.values_list("text", flat=True)) == ["A", "B"]
+    assert [p["id"] for p in api_client.get(reverse("poll-list"), {"q": "bank"}).data["results"]] == [imported.id]
+
+
+@pytest.mark.django_db
+def test_bulk_import_reports_what_was_kept_before_a_format_error(api_client, admin_user):
+    lines = [json.dumps({"title": f"Q{i}", "options": ["A", "B"]}) for i in range(600)]  # 500 + 100 in chunks
+    body = ("\n".join(lines) + '\n{"title": broken').encode()
+
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.post(
+        reverse("poll-bulk-import"), {"file": SimpleUploadedFile("bank.jsonl", body)}, format="multipart"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["created"] == 600 and response.data["records_read"] == 600
+    assert "invalid JSON" in response.data["format_error"]
+    assert Poll.objects.filter(title__startswith="Q").count() == 600
+
+
+@pytest.mark.django_db
+def test_bulk_import_is_admin_only(api_client, voter_user):
+    api_client.force_authenticate(user=voter_user)
+    response = api_client.post(reverse("poll-bulk-import"), [{"title": "x", "options": ["a"]}], format="json")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_import_polls_command(tmp_path, admin_user):
+    path = tmp_path / "bank.json"
+    path.write_text(json.dumps([{"title": f"Q{i}", "options": ["A", "B"]} for i in range(7)]))
+    out = io.StringIO()
+    call_command("import_polls", str(path), created_by=admin_user.email, chunk_size=3, stdout=out)
+    assert "Imported 7 polls" in out.getvalue()
+    assert Option.objects.filter(poll__title__startswith="Q").count() == 14
+
+
+# -----------------------------
+# Cache Warm-up Tests
+# -----------------------------
+@pytest.mark.django_db
+def test_warm_cache_precomputes_results_for_active_polls(api_client, active_poll, expired_poll):
+    out = io.StringIO()
+    call_command("warm_cache", concurrency=1, url="https://localhost", stdout=out)
+
+    assert cache.get(f"poll_results:{active_poll.id}") is not None
+    assert cache.get(f"poll_results:{expired_poll.id}") is None
+    assert "Warmed 3/3 URLs for 1 polls" in out.getvalue()
+
+    # the pages are cached exactly as public clients ask for them
+    for url in (reverse("poll-list"), reverse("poll-detail", kwargs={"pk": active_poll.id})):
+        assert api_client.get(url, HTTP_HOST="localhost", secure=True)["X-Cache"] == "HIT"
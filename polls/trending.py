@@ -0,0 +1,71 @@
+"""
+Incrementally maintained poll scores for the `trending` and `popular` feeds.
+
+`Poll.vote_count` is a plain counter. `Poll.trending_score` is an
+exponentially time-decayed vote count stored in log space relative to a
+fixed epoch:
+
+    score = ln( Σ exp(w(t_vote)) ),   w(t) = ln 2 · (t − EPOCH) / HALF_LIFE
+
+Decay multiplies every poll's score by the same factor, so ranking by the
+stored value equals ranking by the decayed value at any moment, and a new
+vote only needs `score = logaddexp(score, w(now))` — a single UPDATE with
+no reads. Both columns are indexed, so reading the top N is an index scan.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+TRENDING_HALF_LIFE = timedelta(hours=getattr(settings, "POLLS_TRENDING_HALF_LIFE_HOURS", 12))
+
+FEED_DEFAULT_LIMIT = 10
+FEED_MAX_LIMIT = 50
+
+
+def vote_weight(when, count=1):
+    """Log-space weight of `count` votes cast at `when`."""
+    elapsed = (when - TRENDING_EPOCH).total_seconds()
+    return math.log(2) * elapsed / TRENDING_HALF_LIFE.total_seconds() + math.log(count)
+
+
+def logaddexp(weight):
+    """
+    DB expression for ln(exp(trending_score) + exp(weight)), written so it
+    never overflows: max(a, b) + ln(1 + exp(-|a − b|)).
+    """
+    score = F("trending_score")
+    weight = Value(weight)
+    return Greatest(score, weight) + Ln(Value(1.0) + Exp(-Abs(score - weight)))
+
+
+def record_votes(poll_id, count, when):
+    """Add `count` votes cast at `when` to the poll's counters (one UPDATE)."""
+    from .models import Poll
+
+    Poll.objects.filter(pk=poll_id).update(
+        vote_count=F("vote_count") + count,
+        trending_score=logaddexp(vote_weight(when, count)),
+    )
+
+
+def remove_vote(poll_id):
+    """
+    Decrement the vote counter. The trending score is left as is: it
+    measures recent voting activity, and subtracting in log space loses
+    precision, so a retracted vote simply decays away.
+    """
+    from .models import Poll
+
+    Poll.objects.filter(pk=poll_id, vote_count__gt=0).update(vote_count=F("vote_count") - 1)
+
+
+def parse_limit(raw):
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        return FEED_DEFAULT_LIMIT
+    return max(1, min(limit, FEED_MAX_LIMIT))
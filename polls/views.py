@@ -1,29 +1,47 @@
+from datetime import date
+
 from django.utils import timezone
-from django.db.models import Count
 from django.core.cache import cache
+from django.http import Http404, StreamingHttpResponse
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response
 
+from api.throttling import VoteThrottle, VoteIPThrottle
 from .models import Poll, Option, Vote
 from .serializers import (
     PollSerializer,
     CreatePollSerializer,
     VoteSerializer,
     AddOptionSerializer,
+    BallotSerializer,
+)
+from .permissions import IsAdminOrReadOnly, IsPollAdmin
+from . import (
+    breakdown, exports, idempotency, importer, poll_meta, results, rollups, runoff, search, sketches, trending,
 )
-from .permissions import IsAdminOrReadOnly
 
 
 class PollViewSet(viewsets.ModelViewSet):
     """
     Poll API:
-    - GET    /polls/              → List available polls (non-expired)
+    - GET    /polls/              → List available polls (non-expired), `?q=` for ranked full-text search
     - POST   /polls/              → Create poll (admin only)
     - GET    /polls/{id}/         → Retrieve poll
-    - POST   /polls/{id}/vote/    → Vote on a poll (authenticated)
+    - POST   /polls/{id}/vote/    → Vote on a poll (authenticated, honours `Idempotency-Key`)
+    - PUT    /polls/{id}/vote/    → Change your vote (same body as POST); DELETE retracts it
+    - POST   /polls/ballot/       → Vote in many polls at once (authenticated, per-item status;
+                                    `option_ids` for multi/ranked polls)
+    - POST   /polls/import/       → Bulk-create polls from a JSON/JSONL upload (admin only)
     - POST   /polls/{id}/options/ → Add option to poll (admin only, before expiry)
-    - GET    /polls/{id}/results/ → Poll results (cached 1 min)
+    - GET    /polls/{id}/results/ → Poll results (cached ≤1 min, patched in place on votes)
+    - GET    /polls/{id}/results/?by=role|cohort|day → Results cross-tab by voter attribute (admin only)
+    - GET    /polls/trending/     → Active polls with the most recent voting activity (at least one vote)
+    - GET    /polls/popular/      → Active polls with the most votes
+    - GET    /polls/{id}/timeseries/?interval=minute|hour|day → Vote velocity (admin only)
+    - GET    /polls/analytics/unique-voters/?polls=&from=&to=&group= → Approx. distinct voters (admin only)
+    - GET    /polls/{id}/export/  → Streaming CSV of raw votes, `?gzip=1` to compress (admin only)
     """
 
     queryset = Poll.objects.all().select_related("created_by").prefetch_related("options")
@@ -37,6 +55,8 @@ class PollViewSet(viewsets.ModelViewSet):
             return CreatePollSerializer
         if self.action == "vote":
             return VoteSerializer
+        if self.action == "ballot":
+            return BallotSerializer
         if self.action == "options":
             return AddOptionSerializer
         return PollSerializer
@@ -44,48 +64,153 @@ class PollViewSet(viewsets.ModelViewSet):
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context["request"] = self.request
+        if self.action == "vote":
+            context["poll_id"] = self.kwargs["pk"]
         return context
 
     # -------------------------------
     # Permissions per action
     # -------------------------------
     def get_permissions(self):
-        if self.action in ["list", "retrieve", "results"]:
+        if self.action in ["list", "retrieve", "results", "trending", "popular"]:
             return [permissions.AllowAny()]
-        if self.action == "vote":
+        if self.action in ["vote", "ballot"]:
             return [permissions.IsAuthenticated()]
+        if self.action in ["timeseries", "export", "bulk_import", "unique_voters"]:
+            return [IsPollAdmin()]
         return [IsAdminOrReadOnly()]
 
     # -------------------------------
     # Querysets
     # -------------------------------
     def get_queryset(self):
-        """For `list` → return only active polls (non-expired)."""
+        """For `list` → return only active polls (non-expired), optionally searched with `?q=`."""
         qs = super().get_queryset()
         if self.action == "list":
-            return qs.filter(expires_at__gt=timezone.now()).order_by("-created_at")
+            qs = qs.filter(expires_at__gt=timezone.now()).order_by("-created_at")
+            q = self.request.query_params.get("q")
+            if q:
+                qs = search.search_polls(qs, q)
+            return qs
         return qs
 
     # -------------------------------
     # Actions
     # -------------------------------
-    @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
+    @action(
+        detail=True,
+        methods=["post", "put", "delete"],
+        permission_classes=[permissions.IsAuthenticated],
+        throttle_classes=[VoteThrottle, VoteIPThrottle],
+    )
     def vote(self, request, pk=None):
-        """Vote on a poll (authenticated users only)."""
-        poll = self.get_object()
+        """
+        Vote on a poll (authenticated users only).
+        POST casts the vote; send an `Idempotency-Key` header to make retries
+        safe: replays get the original response from the cache without
+        touching the database. PUT {"option_id": ...} changes it, DELETE
+        retracts it.
+        """
+        if request.method == "PUT":
+            return self._change_vote()
+        if request.method == "DELETE":
+            return self._retract_vote()
+        return idempotency.run_idempotent(request, f"vote:{pk}", self._cast_vote)
 
-        if poll.expires_at and poll.expires_at <= timezone.now():
+    def _open_poll_error(self):
+        """
+        Cached poll metadata instead of get_object(): validating a vote costs
+        no queries. 404 for unknown polls, an error response once expired.
+        """
+        meta = poll_meta.get(self.kwargs["pk"])
+        if meta is None:
+            raise Http404
+        if meta.expires_at and meta.expires_at <= timezone.now():
             return Response({"error": "This poll has expired."}, status=status.HTTP_400_BAD_REQUEST)
+        return None
 
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()  # No need to pass poll, serializer handles it
+    def _own_vote(self):
+        vote = Vote.objects.filter(user=self.request.user, poll_id=self.kwargs["pk"]).first()
+        if vote is None:
+            raise NotFound("You have not voted in this poll.")
+        return vote
 
-        # Invalidate results cache
-        cache.delete(f"poll_results:{poll.id}")
+    def _cast_vote(self):
+        error = self._open_poll_error()
+        if error:
+            return error
+
+        serializer = self.get_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()  # tallies + cached results are updated by polls.events
 
         return Response({"message": "Vote recorded successfully."}, status=status.HTTP_201_CREATED)
 
+    def _change_vote(self):
+        error = self._open_poll_error()
+        if error:
+            return error
+
+        serializer = self.get_serializer(self._own_vote(), data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response({"message": "Vote updated successfully."}, status=status.HTTP_200_OK)
+
+    def _retract_vote(self):
+        error = self._open_poll_error()
+        if error:
+            return error
+
+        self._own_vote().delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[permissions.IsAuthenticated],
+        throttle_classes=[VoteThrottle, VoteIPThrottle],
+    )
+    def ballot(self, request):
+        """
+        Cast votes in up to 100 polls in one request:
+        {"votes": [{"poll_id": 1, "option_id": 3}, {"poll_id": 2, "option_ids": [5, 4]}, ...]}.
+        Each item gets its own status; also honours `Idempotency-Key`.
+        """
+        return idempotency.run_idempotent(request, "ballot", self._cast_ballot)
+
+    def _cast_ballot(self):
+        serializer = self.get_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        created = sum(1 for r in results if r["status"] == "created")
+        return Response({"created": created, "results": results}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"], url_path="import", permission_classes=[IsPollAdmin])
+    def bulk_import(self, request):
+        """
+        Bulk-create polls with their options. Send either a multipart `file`
+        (JSON array or JSONL, stream-parsed) or a JSON array body.
+        Invalid records are skipped and reported by index. Not atomic: on
+        malformed input the records before the error are kept and the 400
+        report says how many were read (`records_read`).
+        """
+        upload = request.FILES.get("file")
+        if upload is not None:
+            records = importer.iter_records(importer.read_text_chunks(upload))
+        elif isinstance(request.data, list):
+            records = request.data
+        else:
+            return Response(
+                {"error": "Upload a JSON/JSONL `file` or send a JSON array of polls."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        report = importer.import_polls(records, request.user)
+        if "format_error" in report:  # the valid records before it were still imported
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED if report["created"] else status.HTTP_400_BAD_REQUEST)
+
     @action(detail=True, methods=["post"], permission_classes=[IsAdminOrReadOnly])
     def options(self, request, pk=None):
         """Allow admin to add new options to an existing poll."""
@@ -99,30 +224,124 @@ class PollViewSet(viewsets.ModelViewSet):
         serializer.save(poll=poll)  # Needed here
 
         # Invalidate results cache
-        cache.delete(f"poll_results:{poll.id}")
+        cache.delete_many([results.cache_key(poll.id), runoff.cache_key(poll.id)])
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
     def results(self, request, pk=None):
-        """Return poll results with caching (1 minute)."""
-        cache_key = f"poll_results:{pk}"
-        data = cache.get(cache_key)
+        """
+        Return poll results, cached for up to a minute and patched in place on votes.
+        `?by=role|cohort|day` breaks the votes down by voter attribute (admin only).
+        """
+        by = request.query_params.get("by")
+        if by:
+            return self._results_breakdown(request, by)
 
-        if not data:
+        data = results.get_cached(pk)
+        if data is None:
             poll = self.get_object()
-            options = poll.options.annotate(votes_count=Count("votes"))
-            poll_data = PollSerializer(poll).data
-            total_votes = sum(opt.votes_count for opt in options)
-
-            data = {
-                "poll": poll_data,
-                "total_votes": total_votes,
-                "options": [
-                    {"id": opt.id, "text": opt.text, "votes_count": opt.votes_count}
-                    for opt in options
-                ],
-            }
-            cache.set(cache_key, data, timeout=60)  # Cache for 1 minute
+            data = results.build(poll)
+            results.set_cached(poll.pk, data)
 
         return Response(data)
+
+    def _results_breakdown(self, request, by):
+        if not IsPollAdmin().has_permission(request, self):
+            raise PermissionDenied("Only admins can break results down by voter.")
+        if by not in breakdown.DIMENSIONS:
+            return Response(
+                {"error": f"`by` must be one of: {', '.join(breakdown.DIMENSIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if poll_meta.get(self.kwargs["pk"]) is None:
+            raise Http404
+        return Response(breakdown.get(int(self.kwargs["pk"]), by))
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
+    def trending(self, request):
+        """Top active polls by time-decayed vote activity (`?limit=`, max 50); polls without votes are left out."""
+        return self._feed(request, "-trending_score", vote_count__gt=0)
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
+    def popular(self, request):
+        """Top active polls by total votes (`?limit=`, max 50)."""
+        return self._feed(request, "-vote_count")
+
+    @action(detail=True, methods=["get"], permission_classes=[IsPollAdmin])
+    def timeseries(self, request, pk=None):
+        """Votes per option per bucket, served from the VoteRollup table."""
+        interval = request.query_params.get("interval", rollups.Resolution.HOUR)
+        if interval not in rollups.RESOLUTIONS:
+            return Response(
+                {"interval": f"Must be one of: {', '.join(rollups.RESOLUTIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        poll = self.get_object()
+        return Response({
+            "poll": poll.id,
+            "interval": interval,
+            "options": [{"id": opt.id, "text": opt.text} for opt in poll.options.all()],
+            "buckets": rollups.series(poll.id, interval),
+        })
+
+    @action(detail=False, methods=["get"], url_path="analytics/unique-voters", permission_classes=[IsPollAdmin])
+    def unique_voters(self, request):
+        """
+        Approximate distinct voters (HyperLogLog, ≈2.3% standard error) of the
+        union of `?polls=1,2,3` and/or the days `?from=YYYY-MM-DD&to=YYYY-MM-DD`;
+        `&group=day|week` adds a per-period series over the day range.
+        """
+        params = request.query_params
+        errors = {}
+        try:
+            poll_ids = [int(p) for p in params.get("polls", "").split(",") if p.strip()]
+        except ValueError:
+            errors["polls"] = "Must be a comma-separated list of poll ids."
+            poll_ids = []
+
+        start = end = None
+        if params.get("from") or params.get("to"):
+            try:
+                start = date.fromisoformat(params.get("from", ""))
+                end = date.fromisoformat(params.get("to", ""))
+            except ValueError:
+                errors["from"] = "`from` and `to` must both be dates (YYYY-MM-DD)."
+            else:
+                if not 0 <= (end - start).days < sketches.MAX_DAYS:
+                    errors["to"] = f"Must be on or after `from`, at most {sketches.MAX_DAYS} days later."
+
+        group = params.get("group")
+        if group and (group not in ("day", "week") or start is None):
+            errors["group"] = "Must be `day` or `week`, with a `from`/`to` range."
+        if not errors and not poll_ids and start is None:
+            errors["polls"] = "Give `polls` and/or a `from`/`to` day range."
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(sketches.unique_voters(poll_ids, start, end, group))
+
+    @action(detail=True, methods=["get"], permission_classes=[IsPollAdmin])
+    def export(self, request, pk=None):
+        """Stream every vote of the poll as CSV (constant memory)."""
+        poll = self.get_object()
+        compress = request.query_params.get("gzip") in ("1", "true")
+
+        filename = f"poll-{poll.id}-votes.csv" + (".gz" if compress else "")
+        response = StreamingHttpResponse(
+            exports.stream_votes_csv(poll.id, compress=compress),
+            content_type="application/gzip" if compress else "text/csv; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def _feed(self, request, ordering, **filters):
+        # Both orderings are indexed columns, so this reads ~limit rows.
+        limit = trending.parse_limit(request.query_params.get("limit"))
+        polls = (
+            self.get_queryset()
+            .filter(expires_at__gt=timezone.now(), **filters)
+            .order_by(ordering, "-id")[:limit]
+        )
+        return Response(PollSerializer(polls, many=True).data)